@@ -4,6 +4,8 @@ from sqlalchemy import create_engine
 from db import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
 from datetime import datetime
 import math
+from data_fetcher import DataFetcher, has_next_page, next_page_cursors
+from rendering import quotes_html, authors_html
 
 # Configuración de la página al inicio
 st.set_page_config(page_title="Frases Célebres", layout="wide")
@@ -21,115 +23,63 @@ class DatabaseConnector:
         """Creates a SQLAlchemy engine."""
         return create_engine(f'postgresql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}')
 
-    def fetch_data(self, query):
-        """Fetches data from the database using the provided query."""
+    def fetch_data(self, query, params=None):
+        """Fetches data from the database using the provided query and optional parameters."""
         with self.engine.connect() as conn:
-            df = pd.read_sql_query(query, conn)
+            df = pd.read_sql_query(query, conn, params=params)
         return df
 
-class DataFetcher:
-    def __init__(self, db_connector):
-        self.db_connector = db_connector
-
-    def get_data(self):
-        """Fetches and returns data from the database."""
-        frases_query = """
-        SELECT frase.frase_texto, autor.autor_id, autor.autor_nombre, autor.autor_apellido, autor.autor_url, array_agg(tag.tag_texto) as tags
-        FROM frase
-        JOIN autor ON frase.autor_id = autor.autor_id
-        JOIN frase_tag ON frase.frase_id = frase_tag.frase_id
-        JOIN tag ON frase_tag.tag_id = tag.tag_id
-        GROUP BY frase.frase_id, autor.autor_id, autor.autor_nombre, autor.autor_apellido, autor.autor_url
-        """
-        autores_query = """
-        SELECT autor_id, autor_nombre, autor_apellido, autor_fecha_nac, autor_lugar_nac, autor_descripcion
-        FROM autor
-        """
-        tags_query = """
-        SELECT tag_id, tag_texto
-        FROM tag
-        """
-        frases_df = self.db_connector.fetch_data(frases_query)
-        autores_df = self.db_connector.fetch_data(autores_query)
-        tags_df = self.db_connector.fetch_data(tags_query)
-        return frases_df, autores_df, tags_df
-
-    def get_quotes_by_author_id(self, author_id):
-        """Fetches quotes by a specific author ID."""
-        query = f"""
-        SELECT frase.frase_texto, autor.autor_nombre, autor.autor_apellido, autor.autor_url, array_agg(tag.tag_texto) as tags
-        FROM frase
-        JOIN autor ON frase.autor_id = autor.autor_id
-        JOIN frase_tag ON frase.frase_id = frase_tag.frase_id
-        JOIN tag ON frase_tag.tag_id = tag.tag_id
-        WHERE autor.autor_id = {author_id}
-        GROUP BY frase.frase_id, autor.autor_nombre, autor.autor_apellido, autor.autor_url
-        """
-        return self.db_connector.fetch_data(query)
-
-    def get_quotes_by_author(self, author_name):
-        """Fetches quotes by a specific author."""
-        query = f"""
-        SELECT frase.frase_texto, autor.autor_nombre, autor.autor_apellido, autor.autor_url, array_agg(tag.tag_texto) as tags
-        FROM frase
-        JOIN autor ON frase.autor_id = autor.autor_id
-        JOIN frase_tag ON frase.frase_id = frase_tag.frase_id
-        JOIN tag ON frase_tag.tag_id = tag.tag_id
-        WHERE autor.autor_nombre ILIKE '%{author_name}%' OR autor.autor_apellido ILIKE '%{author_name}%'
-        GROUP BY frase.frase_id, autor.autor_nombre, autor.autor_apellido, autor.autor_url
-        """
-        return self.db_connector.fetch_data(query)
-
-    def get_quotes_by_tag(self, tag_text):
-        """Fetches quotes by a specific tag."""
-        query = f"""
-        SELECT frase.frase_texto, autor.autor_nombre, autor.autor_apellido, autor.autor_url, array_agg(tag.tag_texto) as tags
-        FROM frase
-        JOIN autor ON frase.autor_id = autor.autor_id
-        JOIN frase_tag ON frase.frase_id = frase_tag.frase_id
-        JOIN tag ON frase_tag.tag_id = tag.tag_id
-        WHERE tag.tag_texto ILIKE '%{tag_text}%'
-        GROUP BY frase.frase_id, autor.autor_nombre, autor.autor_apellido, autor.autor_url
-        """
-        return self.db_connector.fetch_data(query)
+@st.cache_resource
+def get_data_fetcher():
+    """Creates the connector and data fetcher once per process so the query cache survives reruns."""
+    db_connector = DatabaseConnector(
+        db_name=DB_NAME,
+        db_user=DB_USER,
+        db_password=DB_PASSWORD,
+        db_host=DB_HOST,
+        db_port=DB_PORT
+    )
+    return DataFetcher(db_connector)
+
 
+# Elementos por página y máximo de resultados que se pueden recorrer en una búsqueda por tag o autor
+ITEMS_PER_PAGE = 10
+MAX_SEARCH_RESULTS = 500
 
 class StreamlitApp:
     def __init__(self):
-        self.db_connector = DatabaseConnector(
-            db_name=DB_NAME,
-            db_user=DB_USER,
-            db_password=DB_PASSWORD,
-            db_host=DB_HOST,
-            db_port=DB_PORT
-        )
-        self.data_fetcher = DataFetcher(self.db_connector)
+        self.data_fetcher = get_data_fetcher()
+        self.db_connector = self.data_fetcher.db_connector
 
     def show_quotes(self):
         st.subheader("Frases")
-        frases_df, _, _ = self.data_fetcher.get_data()
-        self.display_data_with_pagination(frases_df, self.display_quote, 'quotes')
+        self.display_data_with_pagination(self.data_fetcher.get_frases_page, self.data_fetcher.count_frases(),
+                                          'frase_id', self.display_quotes, 'quotes')
 
     def show_authors(self):
         st.subheader("Autores")
-        _, autores_df, _ = self.data_fetcher.get_data()
-        self.display_data_with_pagination(autores_df, self.display_author, 'authors')
+        self.display_data_with_pagination(self.data_fetcher.get_autores_page, self.data_fetcher.count_autores(),
+                                          'autor_id', self.display_authors, 'authors')
 
-    def display_data_with_pagination(self, data_df, display_func, page_type):
-        items_per_page = 10
-        if page_type not in st.session_state:
+    def display_data_with_pagination(self, fetch_page, total_items, id_column, display_page, page_type):
+        """
+        Shows one page of results fetched on demand with keyset pagination. The session keeps the
+        last id of every previous page (the cursors) so "Anterior" and "Siguiente" are one query each.
+        """
+        items_per_page = ITEMS_PER_PAGE
+        cursors_key = f'{page_type}_cursors'
+        if page_type not in st.session_state or cursors_key not in st.session_state:
             st.session_state[page_type] = 1
+            st.session_state[cursors_key] = [None]
 
-        total_items = len(data_df)
         total_pages = math.ceil(total_items / items_per_page)
         current_page = st.session_state[page_type]
+        cursors = st.session_state[cursors_key]
 
-        start_idx = (current_page - 1) * items_per_page
-        end_idx = min(start_idx + items_per_page, total_items)
+        page_df = fetch_page(after_id=cursors[current_page - 1], limit=items_per_page)
 
         # Mostrar datos de la página actual
-        for index in range(start_idx, end_idx):
-            display_func(data_df.iloc[index])
+        display_page(page_df)
 
         # Controles de navegación
         col1, col2, col3 = st.columns([1, 1, 1])
@@ -140,37 +90,68 @@ class StreamlitApp:
                     st.session_state[page_type] -= 1
                     st.experimental_rerun()
 
+        with col2:
+            st.write(f"Página {current_page} de {max(total_pages, 1)}")
+
         with col3:
-            if current_page < total_pages:
+            if has_next_page(current_page, total_pages, page_df):
                 if st.button('Siguiente', key=f'next_{page_type}', help="Ir a la página siguiente"):
+                    st.session_state[cursors_key] = next_page_cursors(cursors, current_page, page_df, id_column)
                     st.session_state[page_type] += 1
                     st.experimental_rerun()
 
-    def display_quote(self, row):
-        st.markdown(f"""
-        <div style="background-color:#FFFACD;padding:10px;border-radius:10px;margin-bottom:10px;">
-            <p><strong>Frase:</strong> {row['frase_texto']}</p>
-            <p><strong>Autor:</strong> <a href="{row['autor_url']}" target="_blank">{row['autor_nombre']} {row['autor_apellido']}</a></p>
-            <p><strong>Tags:</strong> {', '.join(row['tags'])}</p>
-        </div>
-        """, unsafe_allow_html=True)
-
-    def display_author(self, row):
-        st.markdown(f"""
-        <div style="background-color:#E6E6FA;padding:10px;border-radius:10px;margin-bottom:10px;">
-            <p><strong>Nombre:</strong> {row['autor_nombre']} {row['autor_apellido']}</p>
-            <p><strong>Fecha de nacimiento:</strong> {row['autor_fecha_nac']}</p>
-            <p><strong>Lugar de nacimiento:</strong> {row['autor_lugar_nac']}</p>
-            <p><strong>Descripción:</strong> {row['autor_descripcion']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    def display_quotes(self, frases_df):
+        """Renders a page of quotes as a single HTML block (one Streamlit element per page)."""
+        st.markdown(quotes_html(frases_df), unsafe_allow_html=True)
+
+    def display_authors(self, autores_df):
+        """Renders a page of authors as a single HTML block (one Streamlit element per page)."""
+        st.markdown(authors_html(autores_df), unsafe_allow_html=True)
+
+    def result_page(self, page_type, selection):
+        """Returns the current page of a result list, going back to the first one when the selection changes."""
+        selection_key = f'{page_type}_selection'
+        page_key = f'{page_type}_page'
+        if page_key not in st.session_state or st.session_state.get(selection_key) != selection:
+            st.session_state[selection_key] = selection
+            st.session_state[page_key] = 1
+        return st.session_state[page_key]
+
+    def display_page_controls(self, page_type, current_page, total_pages):
+        """Shows the previous/next buttons for a result list paginated with result_page."""
+        page_key = f'{page_type}_page'
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col1:
+            if current_page > 1:
+                if st.button('Anterior', key=f'previous_{page_type}', help="Ir a la página anterior"):
+                    st.session_state[page_key] -= 1
+                    st.experimental_rerun()
+        with col2:
+            st.write(f"Página {current_page} de {max(total_pages, 1)}")
+        with col3:
+            if current_page < total_pages:
+                if st.button('Siguiente', key=f'next_{page_type}', help="Ir a la página siguiente"):
+                    st.session_state[page_key] += 1
+                    st.experimental_rerun()
+
+    def display_quote_results(self, quote_index, positions, selection, page_type):
+        """Shows search results from the quote index, capped at MAX_SEARCH_RESULTS and paginated."""
+        if len(positions) > MAX_SEARCH_RESULTS:
+            st.write(f"Se muestran las primeras {MAX_SEARCH_RESULTS} de {len(positions)} frases.")
+            positions = positions[:MAX_SEARCH_RESULTS]
+
+        current_page = self.result_page(page_type, selection)
+        start = (current_page - 1) * ITEMS_PER_PAGE
+        self.display_quotes(quote_index.rows(positions[start:start + ITEMS_PER_PAGE]))
+        self.display_page_controls(page_type, current_page, math.ceil(len(positions) / ITEMS_PER_PAGE))
 
     def search_quotes_by_author(self):
         st.subheader("Buscar Frases por Autor")
 
         # Obtener los datos necesarios
         try:
-            frases_df, autores_df, _ = self.data_fetcher.get_data()
+            # Solo hacen falta los nombres para el dropdown
+            autores_df = self.data_fetcher.get_autores(columns=['autor_id', 'autor_nombre', 'autor_apellido'])
         except Exception as e:
             st.error(f"Error al obtener los datos de la base de datos: {e}")
             return
@@ -200,11 +181,12 @@ class StreamlitApp:
         # Buscar y mostrar frases por autor
         if selected_author_id:
             try:
-                frases_df_by_author = self.data_fetcher.get_quotes_by_author_id(selected_author_id)
-                if not frases_df_by_author.empty:
+                # Las frases se obtienen del índice en memoria, sin consultar la base de datos
+                quote_index = self.data_fetcher.get_quote_index()
+                positions = quote_index.quotes_by_author(selected_author_id)
+                if len(positions) > 0:
                     st.write(f"Frases del autor seleccionado:")
-                    for index, row in frases_df_by_author.iterrows():
-                        self.display_quote(row)
+                    self.display_quote_results(quote_index, positions, int(selected_author_id), 'author_search')
                 else:
                     st.write("No se encontraron frases para el autor seleccionado.")
             except Exception as e:
@@ -215,58 +197,69 @@ class StreamlitApp:
 
         # Obtener los datos necesarios
         try:
-            frases_df, _, tags_df = self.data_fetcher.get_data()
+            tags_df = self.data_fetcher.get_tags()
+            quote_index = self.data_fetcher.get_quote_index()
         except Exception as e:
             st.error(f"Error al obtener los datos de la base de datos: {e}")
             return
 
         # Crear lista de selección para los dropdowns
-        tag_options = tags_df['tag_texto'].tolist()
+        tag_options = sorted(tags_df['tag_texto'].tolist())
 
-        # Dropdown para selección de tag
-        selected_tag = st.selectbox("Selecciona un tag", tag_options)
+        # Selección de uno o varios tags y de cómo combinarlos
+        selected_tags = st.multiselect("Selecciona uno o varios tags", tag_options)
+        mode = st.radio("Mostrar frases con", ['todos los tags', 'alguno de los tags'], horizontal=True)
 
-        # Buscar y mostrar frases por tag
-        if selected_tag:
-            try:
-                # Filtrar frases relacionadas con el tag seleccionado
-                query = f"""
-                SELECT frase.frase_texto, autor.autor_nombre, autor.autor_apellido, autor.autor_url, array_agg(tag.tag_texto) as tags
-                FROM frase
-                JOIN frase_tag ON frase.frase_id = frase_tag.frase_id
-                JOIN tag ON frase_tag.tag_id = tag.tag_id
-                JOIN autor ON frase.autor_id = autor.autor_id
-                WHERE tag.tag_texto = %s
-                GROUP BY frase.frase_id, autor.autor_nombre, autor.autor_apellido, autor.autor_url
-                """
-                
-                # Ejecutar la consulta
-                with self.db_connector.engine.connect() as conn:
-                    frases_df_by_tag = pd.read_sql_query(query, conn, params=(selected_tag,))
-                
-                if not frases_df_by_tag.empty:
-                    st.write(f"Frases con el tag '{selected_tag}':")
-                    for index, row in frases_df_by_tag.iterrows():
-                        self.display_quote(row)
-                else:
-                    st.write("No se encontraron frases con el tag seleccionado.")
-            except Exception as e:
-                st.error(f"Error al buscar frases por tag: {e}")
+        # Buscar y mostrar frases por tag con el índice en memoria
+        if selected_tags:
+            filter_mode = 'and' if mode == 'todos los tags' else 'or'
+            positions = quote_index.filter_tags(selected_tags, filter_mode)
+
+            related_tags = quote_index.co_occurring_tags(selected_tags)
+            if related_tags:
+                st.write("Tags relacionados: " + ", ".join(f"{tag} ({count})" for tag, count in related_tags))
+
+            if len(positions) > 0:
+                st.write(f"Frases con los tags seleccionados ({len(positions)}):")
+                self.display_quote_results(quote_index, positions, (tuple(selected_tags), filter_mode), 'tag_search')
+            else:
+                st.write("No se encontraron frases con los tags seleccionados.")
 
+    def search_quotes(self):
+        st.subheader("Buscar")
+        search_text = st.text_input("Buscar frases por texto o autor", help='Admite "frases exactas", OR y -palabra')
+        search_text = search_text.strip()
+        if not search_text:
+            return
 
+        current_page = self.result_page('search', search_text)
 
+        try:
+            total_items = self.data_fetcher.count_search_results(search_text)
+            results_df = self.data_fetcher.search_quotes(search_text, offset=(current_page - 1) * ITEMS_PER_PAGE,
+                                                         limit=ITEMS_PER_PAGE)
+        except Exception as e:
+            st.error(f"Error al buscar frases: {e}")
+            return
+
+        if results_df.empty:
+            st.write("No se encontraron frases.")
+            return
+
+        st.write(f"{total_items} frases encontradas.")
+        self.display_quotes(results_df)
+        self.display_page_controls('search', current_page, math.ceil(total_items / ITEMS_PER_PAGE))
 
     def show_statistics(self):
         st.subheader("Estadísticas")
-        frases_df, _, _ = self.data_fetcher.get_data()
-
-        frases_por_autor = frases_df.groupby(['autor_nombre', 'autor_apellido']).size().reset_index(name='counts')
-        frases_por_autor['full_name'] = frases_por_autor['autor_nombre'] + ' ' + frases_por_autor['autor_apellido']
+        # Los conteos se calculan en la base de datos en cada actualización; aquí solo se leen
+        frases_por_autor = self.data_fetcher.get_author_stats()
+        full_names = frases_por_autor['autor_nombre'] + ' ' + frases_por_autor['autor_apellido']
 
-        frases_por_tag = frases_df.explode('tags').groupby('tags').size().reset_index(name='counts')
+        frases_por_tag = self.data_fetcher.get_tag_stats()
 
-        st.bar_chart(frases_por_autor.set_index('full_name')['counts'], height=300)
-        st.bar_chart(frases_por_tag.set_index('tags')['counts'], height=300)
+        st.bar_chart(pd.Series(frases_por_autor['frases'].values, index=full_names), height=300)
+        st.bar_chart(frases_por_tag.set_index('tag_texto')['frases'], height=300)
 
     # def show_on_this_day(self):
     #     st.subheader("Un día como hoy nacía...")
@@ -298,7 +291,7 @@ class StreamlitApp:
     def run(self):
         """Runs the Streamlit app."""
         st.sidebar.title("Navegación")
-        menu = ["Frases", "Autores", "Buscar Frases por Autor", "Buscar Frases por Tag", "Estadísticas"]
+        menu = ["Frases", "Autores", "Buscar", "Buscar Frases por Autor", "Buscar Frases por Tag", "Estadísticas"]
         choice = st.sidebar.selectbox("Selecciona una opción", menu)
 
         st.title("Frases Célebres")
@@ -307,6 +300,8 @@ class StreamlitApp:
             self.show_quotes()
         elif choice == "Autores":
             self.show_authors()
+        elif choice == "Buscar":
+            self.search_quotes()
         elif choice == "Buscar Frases por Autor":
             self.search_quotes_by_author()
         elif choice == "Buscar Frases por Tag":
@@ -0,0 +1,81 @@
+import json
+import os
+import time
+
+
+class AuthorCache:
+    """
+    Caché de los detalles de autor indexada por autor_url.
+
+    Siempre mantiene una capa en memoria válida durante la ejecución actual. Si se indica
+    una ruta, los detalles también se guardan en un archivo JSON en disco y se descartan
+    cuando superan el TTL (en segundos), de modo que las ejecuciones diarias no vuelvan a
+    descargar páginas de autor que ya se conocen.
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        if self.path:
+            self.load()
+
+    def _is_expired(self, entry, now=None):
+        if self.ttl is None:
+            return False
+        now = time.time() if now is None else now
+        return now - entry['timestamp'] > self.ttl
+
+    def get(self, autor_url):
+        """Devuelve los detalles guardados para la URL o None si no existen o han caducado."""
+        entry = self.entries.get(autor_url)
+        if entry is None or self._is_expired(entry):
+            self.entries.pop(autor_url, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['details']
+
+    def set(self, autor_url, details):
+        self.entries[autor_url] = {'details': details, 'timestamp': time.time()}
+
+    def __contains__(self, autor_url):
+        entry = self.entries.get(autor_url)
+        return entry is not None and not self._is_expired(entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def evict_expired(self):
+        """Elimina las entradas caducadas y devuelve cuántas se descartaron."""
+        now = time.time()
+        expired = [url for url, entry in self.entries.items() if self._is_expired(entry, now)]
+        for url in expired:
+            del self.entries[url]
+        return len(expired)
+
+    def load(self):
+        """Carga la capa persistente desde disco, descartando las entradas caducadas."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self.evict_expired()
+
+    def save(self):
+        """Guarda la caché en disco (solo si se configuró una ruta)."""
+        if not self.path:
+            return
+        self.evict_expired()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,98 @@
+"""
+Benchmark de extremo a extremo del scraper contra el sitio sintético de benchmarks.fixture_server.
+
+Mide, para el modo secuencial (scrape_quotes) y el concurrente (scrape_quotes_async), el tiempo
+total, las páginas del listado con frases procesadas por segundo, las peticiones por tipo y el
+pico de memoria. Las peticiones del listado de más (la página vacía que lo cierra y, en modo
+concurrente, las páginas posteriores de cada bloque) se muestran aparte y no cuentan como páginas.
+Uso, desde el directorio raíz:
+    python -m benchmarks.bench_crawl [--pages 50] [--quotes-per-page 10] [--author-reuse 0.8]
+                                     [--latency 0.01] [--parser lxml] [--concurrency 10]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from author_cache import AuthorCache
+from benchmarks.fixture_server import QuotesSiteServer
+from http_cache import ConditionalCache
+from scraper import Scraper
+
+MODES = ('sync', 'async')
+
+
+def new_scraper(server, parser):
+    # Cachés solo en memoria y vacías: cada medida descarga el sitio completo
+    return Scraper(server.base_url, author_cache=AuthorCache(), http_cache=ConditionalCache(), parser=parser)
+
+
+def crawl(server, mode, parser, concurrency):
+    scraper = new_scraper(server, parser)
+    try:
+        if mode == 'sync':
+            frases_df, _ = scraper.scrape_quotes()
+        else:
+            frases_df, _ = asyncio.run(scraper.scrape_quotes_async(concurrency=concurrency))
+    finally:
+        scraper.close()
+    return len(frases_df)
+
+
+def measure(server, mode, parser, concurrency):
+    server.reset_counters()
+    start = time.perf_counter()
+    quotes = crawl(server, mode, parser, concurrency)
+    elapsed = time.perf_counter() - start
+    requests = dict(server.requests)
+    bytes_sent = server.bytes_sent
+
+    # Segunda pasada solo para el pico de memoria: tracemalloc ralentiza la ejecución
+    tracemalloc.start()
+    crawl(server, mode, parser, concurrency)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    listing_requests = requests.get('listing', 0)
+    return {
+        'seconds': elapsed,
+        'quotes': quotes,
+        'pages_per_second': server.pages / elapsed,
+        'listing_requests': listing_requests,
+        'extra_listing_requests': listing_requests - server.pages,
+        'author_requests': requests.get('author', 0),
+        'megabytes': bytes_sent / 1e6,
+        'peak_mb': peak / 1e6,
+    }
+
+
+def run(pages, quotes_per_page, author_reuse, latency, parser, concurrency, modes=MODES):
+    results = {}
+    with QuotesSiteServer(pages, quotes_per_page, author_reuse, latency) as server:
+        for mode in modes:
+            results[mode] = measure(server, mode, parser, concurrency)
+        author_count = server.author_count
+
+    print(f"{pages} páginas x {quotes_per_page} frases, {author_count} autores, latencia {latency * 1000:.0f} ms, "
+          f"parser {parser}, concurrencia {concurrency}")
+    print(f"{'modo':<7}{'segundos':>10}{'págs/s':>10}{'frases':>8}{'listado':>9}{'de más':>8}{'autor':>7}"
+          f"{'MB':>8}{'pico MB':>9}")
+    for mode, r in results.items():
+        print(f"{mode:<7}{r['seconds']:>10.3f}{r['pages_per_second']:>10.1f}{r['quotes']:>8}"
+              f"{r['listing_requests']:>9}{r['extra_listing_requests']:>8}{r['author_requests']:>7}"
+              f"{r['megabytes']:>8.2f}{r['peak_mb']:>9.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--pages', type=int, default=50)
+    arg_parser.add_argument('--quotes-per-page', type=int, default=10)
+    arg_parser.add_argument('--author-reuse', type=float, default=0.8)
+    arg_parser.add_argument('--latency', type=float, default=0.01)
+    arg_parser.add_argument('--parser', default='lxml')
+    arg_parser.add_argument('--concurrency', type=int, default=10)
+    arg_parser.add_argument('--mode', choices=MODES, action='append', help="Por defecto, ambos modos")
+    args = arg_parser.parse_args()
+    run(args.pages, args.quotes_per_page, args.author_reuse, args.latency, args.parser, args.concurrency,
+        modes=args.mode or MODES)
@@ -0,0 +1,43 @@
+"""
+Micro-benchmark de la construcción de DataFrames a partir de las filas del scraper: la del propio
+Scraper, la de AsyncDataSaver (por lote) y la normalización de DataNormalizer.
+
+Uso, desde el directorio raíz:
+    python -m benchmarks.bench_dataframes [--quotes 10000] [--authors 500] [--repeat 20]
+"""
+import argparse
+import timeit
+
+from benchmarks.fixtures import TAG_POOL, synthetic_rows
+from data_normalizer import DataNormalizer
+from save_data_to_db import AsyncDataSaver
+from scraper import Scraper
+
+
+def run(quote_count, author_count, repeat):
+    rows = synthetic_rows(quote_count, author_count)
+    scraper = Scraper("https://quotes.toscrape.com/")
+    scraper.tags_dict = {tag: index + 1 for index, tag in enumerate(TAG_POOL)}
+    frases_df, tags_df = scraper.rows_to_dataframes(rows, all_tags=True)
+
+    steps = {
+        'Scraper.rows_to_dataframes': lambda: scraper.rows_to_dataframes(rows, all_tags=True),
+        'AsyncDataSaver.rows_to_dataframes': lambda: AsyncDataSaver.rows_to_dataframes(rows),
+        'DataNormalizer.normalize': lambda: DataNormalizer.normalize(frases_df, tags_df),
+    }
+    scraper.close()
+
+    print(f"{quote_count} frases, {author_count} autores, {repeat} repeticiones")
+    print(f"{'paso':<36}{'ms':>10}{'filas/s':>14}")
+    for name, step in steps.items():
+        ms = timeit.timeit(step, number=repeat) / repeat * 1000
+        print(f"{name:<36}{ms:>10.2f}{quote_count / ms * 1000:>14.0f}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--quotes', type=int, default=10000)
+    arg_parser.add_argument('--authors', type=int, default=500)
+    arg_parser.add_argument('--repeat', type=int, default=20)
+    args = arg_parser.parse_args()
+    run(args.quotes, args.authors, args.repeat)
@@ -0,0 +1,94 @@
+"""
+Compara los métodos de carga de AsyncDataSaver (copy, prepared y rows) contra un PostgreSQL local.
+
+Las tablas se crean en un esquema propio (bench_loader) que se elimina al terminar, por lo que
+no se tocan los datos reales. Uso, desde el directorio raíz:
+    python -m benchmarks.bench_loader [--quotes 2000] [--authors 200]
+
+La conexión se toma de db.py (DB_NAME, DB_USER, ...).
+"""
+import argparse
+import asyncio
+import time
+
+import asyncpg
+
+import db
+from benchmarks.fixtures import synthetic_rows
+from save_data_to_db import AsyncDataSaver, LOAD_METHODS
+
+SCHEMA = 'bench_loader'
+
+SCHEMA_SQL = f"""
+DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.autor (
+    autor_id SERIAL PRIMARY KEY,
+    autor_nombre VARCHAR(255),
+    autor_apellido VARCHAR(255),
+    autor_url VARCHAR(255),
+    autor_fecha_nac VARCHAR(255),
+    autor_lugar_nac VARCHAR(255),
+    autor_descripcion TEXT,
+    UNIQUE (autor_nombre, autor_apellido)
+);
+CREATE TABLE {SCHEMA}.tag (
+    tag_id SERIAL PRIMARY KEY,
+    tag_texto VARCHAR(255) UNIQUE
+);
+CREATE TABLE {SCHEMA}.frase (
+    frase_id SERIAL PRIMARY KEY,
+    frase_texto TEXT UNIQUE,
+    autor_id INTEGER REFERENCES {SCHEMA}.autor(autor_id)
+);
+CREATE TABLE {SCHEMA}.frase_tag (
+    frase_id INTEGER NOT NULL REFERENCES {SCHEMA}.frase(frase_id) ON DELETE CASCADE,
+    tag_id INTEGER NOT NULL REFERENCES {SCHEMA}.tag(tag_id) ON DELETE CASCADE,
+    PRIMARY KEY (frase_id, tag_id)
+);
+"""
+
+
+async def time_method(conn, method, frases_df, tags_df):
+    await conn.execute(SCHEMA_SQL)
+    saver = AsyncDataSaver(db.DB_NAME, db.DB_USER, db.DB_PASSWORD, db.DB_HOST, db.DB_PORT, method=method)
+    saver.conn = conn
+
+    start = time.perf_counter()
+    async with conn.transaction():
+        await saver.write_dataframes(frases_df, tags_df)
+    elapsed = time.perf_counter() - start
+
+    frases = await conn.fetchval(f"SELECT count(*) FROM {SCHEMA}.frase")
+    relaciones = await conn.fetchval(f"SELECT count(*) FROM {SCHEMA}.frase_tag")
+    return elapsed, frases, relaciones
+
+
+async def run(quote_count, author_count):
+    rows = synthetic_rows(quote_count, author_count)
+    frases_df, tags_df = AsyncDataSaver.rows_to_dataframes(rows)
+
+    conn = await asyncpg.connect(database=db.DB_NAME, user=db.DB_USER, password=db.DB_PASSWORD,
+                                 host=db.DB_HOST, port=db.DB_PORT,
+                                 server_settings={'search_path': SCHEMA})
+    try:
+        results = {}
+        for method in LOAD_METHODS:
+            results[method] = await time_method(conn, method, frases_df, tags_df)
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+    print(f"{quote_count} frases, {author_count} autores, {len(tags_df)} tags")
+    print(f"{'método':<8}{'segundos':>10}{'frases':>10}{'frase_tag':>12}{'speedup':>10}")
+    for method, (elapsed, frases, relaciones) in results.items():
+        speedup = results['rows'][0] / elapsed
+        print(f"{method:<8}{elapsed:>10.3f}{frases:>10}{relaciones:>12}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--quotes', type=int, default=2000)
+    arg_parser.add_argument('--authors', type=int, default=200)
+    args = arg_parser.parse_args()
+    asyncio.run(run(args.quotes, args.authors))
@@ -0,0 +1,45 @@
+"""
+Compara los backends de extracción del scraper sobre el mismo HTML.
+
+Uso, desde el directorio raíz:
+    python -m benchmarks.bench_parsers [--repeat 200]
+"""
+import argparse
+import logging
+import timeit
+
+from benchmarks.fixtures import author_page, quotes_page
+from parsers import PARSERS
+
+BASE_URL = "https://quotes.toscrape.com/"
+
+
+def run(repeat):
+    logger = logging.getLogger(__name__)
+    listing_html = quotes_page(1)
+    author_html = author_page(1)
+    results = {}
+
+    for name, parser_class in PARSERS.items():
+        parser = parser_class(logger)
+        listing = timeit.timeit(lambda: parser.parse_quotes(listing_html, BASE_URL), number=repeat)
+        author = timeit.timeit(lambda: parser.parse_author(author_html), number=repeat)
+        results[name] = (listing / repeat * 1000, author / repeat * 1000)
+
+    # Ambos backends deben extraer exactamente lo mismo
+    outputs = {name: (cls(logger).parse_quotes(listing_html, BASE_URL), cls(logger).parse_author(author_html))
+               for name, cls in PARSERS.items()}
+    reference = outputs['bs4']
+    for name, output in outputs.items():
+        assert output == reference, f"El parser {name} no coincide con bs4"
+
+    print(f"{'parser':<8}{'listado (ms/pág)':>20}{'autor (ms/pág)':>18}{'speedup':>10}")
+    base_listing = results['bs4'][0]
+    for name, (listing_ms, author_ms) in results.items():
+        print(f"{name:<8}{listing_ms:>20.3f}{author_ms:>18.3f}{base_listing / listing_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--repeat', type=int, default=200)
+    run(arg_parser.parse_args().repeat)
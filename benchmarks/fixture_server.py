@@ -0,0 +1,155 @@
+"""
+Servidor HTTP local que imita https://quotes.toscrape.com/ con páginas sintéticas, para medir
+el scraper sin depender de la red.
+
+Uso, desde el directorio raíz (sirve hasta Ctrl+C):
+    python -m benchmarks.fixture_server [--pages 50] [--quotes-per-page 10] [--author-reuse 0.8] [--latency 0.02]
+
+Desde código se usa como context manager:
+    with QuotesSiteServer(pages=20, latency=0.01) as server:
+        Scraper(server.base_url).scrape_quotes()
+"""
+import argparse
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fixtures import author_page, empty_page, quotes_page
+
+PAGE_PATH = re.compile(r'^/+page/(\d+)/?$')
+AUTHOR_PATH = re.compile(r'^/+author/Author-(\d+)/?$')
+
+
+class FixtureHTTPServer(ThreadingHTTPServer):
+    # Con la cola de conexiones pendientes por defecto (5), las conexiones simultáneas del modo
+    # asíncrono se desbordan y el cliente reintenta el SYN un segundo después
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class QuotesSiteServer:
+    """
+    Sitio de frases sintético servido desde un hilo en segundo plano.
+
+    - pages: número de páginas del listado con frases (la siguiente ya está vacía).
+    - quotes_per_page: frases por página.
+    - author_reuse: fracción de frases cuyo autor ya apareció antes (0 = un autor por frase).
+    - latency: segundos de espera añadidos a cada respuesta.
+
+    Cuenta las peticiones por tipo ('listing', 'author', 'other') y los bytes enviados.
+    """
+
+    def __init__(self, pages=10, quotes_per_page=10, author_reuse=0.8, latency=0.0, host='127.0.0.1', port=0):
+        if not 0 <= author_reuse < 1:
+            raise ValueError("author_reuse debe estar en [0, 1)")
+        self.pages = pages
+        self.quotes_per_page = quotes_per_page
+        self.author_count = max(1, round(pages * quotes_per_page * (1 - author_reuse)))
+        self.latency = latency
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.rendered = {}
+        self.httpd = FixtureHTTPServer((host, port), self.handler_class())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def render(self, path):
+        """Devuelve (tipo de petición, HTML) para una ruta, o (tipo, None) si no existe."""
+        page_match = PAGE_PATH.match(path)
+        if page_match:
+            page_number = int(page_match.group(1))
+            if page_number > self.pages:
+                return 'listing', empty_page()
+            return 'listing', quotes_page(page_number, self.quotes_per_page, self.author_count,
+                                          has_next=page_number < self.pages)
+        author_match = AUTHOR_PATH.match(path)
+        if author_match and int(author_match.group(1)) < self.author_count:
+            return 'author', author_page(int(author_match.group(1)))
+        return 'other', None
+
+    def respond(self, path):
+        # Las páginas se generan una vez; así se mide el scraper y no la generación del HTML
+        if path not in self.rendered:
+            kind, body = self.render(path)
+            self.rendered[path] = (kind, body.encode('utf-8') if body is not None else None)
+        return self.rendered[path]
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Cabeceras y cuerpo se envían en escrituras separadas: sin TCP_NODELAY, Nagle y el ACK
+            # retardado añaden ~40 ms a cada petición sobre una conexión reutilizada (keep-alive)
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                kind, body = server.respond(self.path)
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                else:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                with server.lock:
+                    server.requests[kind] += 1
+                    server.bytes_sent += len(body or b'')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests.clear()
+            self.bytes_sent = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--pages', type=int, default=50)
+    arg_parser.add_argument('--quotes-per-page', type=int, default=10)
+    arg_parser.add_argument('--author-reuse', type=float, default=0.8)
+    arg_parser.add_argument('--latency', type=float, default=0.0)
+    arg_parser.add_argument('--port', type=int, default=8000)
+    args = arg_parser.parse_args()
+
+    server = QuotesSiteServer(args.pages, args.quotes_per_page, args.author_reuse, args.latency, port=args.port)
+    print(f"Sirviendo {args.pages} páginas en {server.base_url} (Ctrl+C para salir)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,120 @@
+"""
+HTML sintético con la misma estructura que https://quotes.toscrape.com/ para los benchmarks.
+"""
+import html
+
+TAG_POOL = ['love', 'inspirational', 'life', 'humor', 'books', 'reading', 'friendship', 'friends',
+            'truth', 'simile', 'change', 'deep-thoughts', 'thinking', 'world', 'abilities', 'choices']
+
+
+def author_slug(author_index):
+    return f"Author-{author_index}"
+
+
+def author_name(author_index):
+    return f"Nombre{author_index} Apellido{author_index}"
+
+
+def quote_block(quote_index, author_index, tags_per_quote=4):
+    tags = [TAG_POOL[(quote_index + i) % len(TAG_POOL)] for i in range(tags_per_quote)]
+    tag_links = "\n".join(
+        f'            <a class="tag" href="/tag/{tag}/page/1/">{tag}</a>' for tag in tags)
+    text = html.escape(f"“Frase de prueba número {quote_index}, con algo de texto para que el "
+                       f"tamaño se parezca al de una frase real del sitio.”")
+    return f"""
+    <div class="quote" itemscope itemtype="http://schema.org/CreativeWork">
+        <span class="text" itemprop="text">{text}</span>
+        <span>by <small class="author" itemprop="author">{author_name(author_index)}</small>
+        <a href="/author/{author_slug(author_index)}">(about)</a>
+        </span>
+        <div class="tags">
+            Tags:
+            <meta class="keywords" itemprop="keywords" content="{','.join(tags)}" />
+{tag_links}
+        </div>
+    </div>"""
+
+
+def quotes_page(page_number, quotes_per_page=10, author_count=50, has_next=True):
+    """Página del listado con `quotes_per_page` frases repartidas entre `author_count` autores."""
+    first = (page_number - 1) * quotes_per_page
+    blocks = "".join(quote_block(i, i % author_count) for i in range(first, first + quotes_per_page))
+    pager = f'<li class="next"><a href="/page/{page_number + 1}/">Next</a></li>' if has_next else ''
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Quotes to Scrape</title>
+    <link rel="stylesheet" href="/static/bootstrap.min.css">
+    <link rel="stylesheet" href="/static/main.css">
+</head>
+<body>
+    <div class="container">
+        <div class="row header-box">
+            <div class="col-md-8"><h1><a href="/" style="text-decoration: none">Quotes to Scrape</a></h1></div>
+            <div class="col-md-4"><p><a href="/login">Login</a></p></div>
+        </div>
+    <div class="row">
+    <div class="col-md-8">
+{blocks}
+    <nav><ul class="pager">{pager}</ul></nav>
+    </div>
+    <div class="col-md-4 tags-box">
+        <h2>Top Ten tags</h2>
+        {''.join(f'<span class="tag-item"><a class="tag" href="/tag/{t}/">{t}</a></span>' for t in TAG_POOL[:10])}
+    </div>
+    </div>
+    </div>
+    <footer class="footer"><div class="container"><p class="text-muted">Quotes by: GoodReads.com</p></div></footer>
+</body>
+</html>"""
+
+
+def empty_page():
+    return quotes_page(1, quotes_per_page=0, has_next=False)
+
+
+def author_page(author_index):
+    description = " ".join(["Descripción del autor con varias frases biográficas."] * 20)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="UTF-8"><title>Quotes to Scrape</title></head>
+<body>
+    <div class="container">
+        <div class="author-details">
+            <h3 class="author-title">{author_name(author_index)}</h3>
+            <p><strong>Born:</strong> <span class="author-born-date">March 14, 1879</span>
+            <span class="author-born-location">in Ulm, Germany</span></p>
+            <p><strong>Description:</strong></p>
+            <div class="author-description">
+        {description}
+            </div>
+        </div>
+    </div>
+    <footer class="footer"><div class="container"><p class="text-muted">Quotes by: GoodReads.com</p></div></footer>
+</body>
+</html>"""
+
+
+def synthetic_rows(quote_count, author_count=50, tags_per_quote=4):
+    """
+    Filas con el mismo formato que produce Scraper (una por frase), para los benchmarks de carga.
+    """
+    tag_ids = {tag: index + 1 for index, tag in enumerate(TAG_POOL)}
+    rows = []
+    for quote_index in range(quote_count):
+        author_index = quote_index % author_count
+        nombre, apellido = author_name(author_index).split(' ', 1)
+        tags = [TAG_POOL[(quote_index + i) % len(TAG_POOL)] for i in range(tags_per_quote)]
+        rows.append({
+            'frase_texto': f"“Frase de prueba número {quote_index}.”",
+            'autor_nombre': nombre,
+            'autor_apellido': apellido,
+            'autor_url': f"https://quotes.toscrape.com//author/{author_slug(author_index)}",
+            'autor_fecha_nac': 'March 14, 1879',
+            'autor_lugar_nac': 'in Ulm, Germany',
+            'autor_descripcion': 'Descripción del autor.',
+            'Tags': tags,
+            'Tags_IDs': [tag_ids[tag] for tag in tags]
+        })
+    return rows
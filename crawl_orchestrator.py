@@ -0,0 +1,178 @@
+import asyncio
+import os
+import queue
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+import pandas as pd
+from scraper import Scraper, FRASES_COLUMNS
+from author_cache import AuthorCache
+from http_cache import ConditionalCache
+from crawl_state import CrawlState
+from metrics import Metrics
+from html_archive import ResponseArchive
+
+# Configuración de un sitio de frases: nombre (también carpeta de sus cachés), URL base,
+# selectores XPath de LxmlParser que cambian respecto a quotes.toscrape.com y ruta de las páginas
+SiteConfig = namedtuple('SiteConfig', ['name', 'base_url', 'selectors', 'page_path'],
+                        defaults=(None, 'page/{}/'))
+
+# Opciones de cada scraping, iguales para todos los sitios. Con `archive` las respuestas de cada
+# sitio se guardan en cache_dir/<nombre>/archive (ver html_archive.py)
+CrawlOptions = namedtuple('CrawlOptions', ['cache_dir', 'incremental', 'author_cache_ttl', 'concurrency',
+                                           'requests_per_second', 'archive'],
+                          defaults=('cache', True, 7 * 24 * 3600, 10, None, False))
+
+
+# Segundos que espera el proceso principal por un lote antes de comprobar qué sitios terminaron
+BATCH_POLL_SECONDS = 0.1
+
+
+async def collect_rows(scraper, options, batches=None):
+    """
+    Recorre el sitio página a página. Con `batches` cada lote se envía a esa cola en cuanto está
+    listo y no se acumula nada; sin ella se devuelven todas las filas.
+    """
+    rows = []
+    async for batch in scraper.aiter_quotes(concurrency=options.concurrency,
+                                            requests_per_second=options.requests_per_second):
+        if batches is None:
+            rows.extend(batch)
+        else:
+            # put bloquea si la cola está llena: se hace fuera del bucle de eventos
+            await asyncio.to_thread(batches.put, batch)
+    return rows
+
+
+def crawl_site(site, options, batches=None):
+    """
+    Scraping completo de un sitio, pensado para ejecutarse en un proceso del pool con su propio
+    bucle de eventos. Cada sitio usa sus propias cachés y estado incremental en cache_dir/<nombre>.
+    Devuelve (nombre, filas, estado incremental o None, snapshot de métricas); el estado se
+    guarda en el proceso principal cuando los datos ya están escritos. Si se indica la cola
+    `batches`, las filas se envían por ella página a página y la lista devuelta está vacía.
+    """
+    metrics = Metrics()
+    site_dir = os.path.join(options.cache_dir, site.name)
+    author_cache = AuthorCache(path=os.path.join(site_dir, 'autores.json'), ttl=options.author_cache_ttl)
+    http_cache = ConditionalCache(path=os.path.join(site_dir, 'http.json'))
+    crawl_state = CrawlState(path=os.path.join(site_dir, 'crawl_state.json')) if options.incremental else None
+    archive = ResponseArchive(os.path.join(site_dir, 'archive')) if options.archive else None
+    scraper = Scraper(site.base_url, author_cache=author_cache, http_cache=http_cache, crawl_state=crawl_state,
+                      parser='lxml', selectors=site.selectors, page_path=site.page_path, metrics=metrics,
+                      archive=archive)
+    try:
+        with metrics.timer('crawl_site_seconds', site=site.name):
+            rows = asyncio.run(collect_rows(scraper, options, batches))
+    finally:
+        scraper.close()
+        if archive is not None:
+            archive.close()
+    return site.name, rows, crawl_state, metrics.snapshot()
+
+
+def shutdown_pool(executor, manager, wait):
+    """
+    Cierra el Manager y el pool de procesos. El Manager se cierra primero: un proceso bloqueado
+    en put falla en lugar de esperar indefinidamente. Con wait=False no se espera a los procesos
+    que siguen en marcha; terminan en cuanto intentan enviar su siguiente lote.
+    """
+    manager.shutdown()
+    executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class CrawlOrchestrator:
+    """
+    Ejecuta en paralelo el scraping de varios sitios, cada uno en un proceso de un
+    ProcessPoolExecutor, y une sus resultados en un único conjunto de datos.
+
+    Cada proceso envía las filas de cada página por una cola acotada (de un multiprocessing.Manager)
+    en cuanto las tiene, así que el proceso principal puede escribirlas mientras continúa el
+    scraping y la memoria no crece con el tamaño de los sitios.
+
+    Los IDs de tag que asigna cada Scraper solo son válidos dentro de su proceso, así que al
+    recibir las filas de un sitio se renumeran con un registro global de tags. El registro se
+    inicializa con los tags ya guardados (por ejemplo, los de la tabla tag) para que los IDs
+    coincidan con los de la base de datos.
+    """
+
+    def __init__(self, sites, options=None, max_workers=None, tags=None, batch_size=100, metrics=None,
+                 queue_size=None):
+        self.sites = list(sites)
+        self.options = options if options is not None else CrawlOptions()
+        self.max_workers = max_workers or len(self.sites) or 1
+        self.tags_dict = dict(tags or {})
+        self.next_tag_id = max(self.tags_dict.values(), default=0) + 1
+        self.batch_size = batch_size
+        # Lotes (páginas) que pueden esperar en la cola antes de que los procesos se detengan
+        self.queue_size = queue_size or 2 * self.max_workers
+        self.crawl_states = {}
+        # Las métricas de cada proceso se suman a este registro al recibir sus resultados
+        self.metrics = metrics if metrics is not None else Metrics()
+
+    def tag_id(self, tag):
+        if tag not in self.tags_dict:
+            self.tags_dict[tag] = self.next_tag_id
+            self.next_tag_id += 1
+        return self.tags_dict[tag]
+
+    def assign_tag_ids(self, rows):
+        """Sustituye los IDs de tag de cada fila por los del registro global."""
+        for row in rows:
+            row['Tags_IDs'] = [self.tag_id(tag) for tag in row['Tags']]
+        return rows
+
+    async def aiter_quotes(self):
+        """
+        Iterador asíncrono de lotes de filas de todos los sitios, con los IDs de tag globales,
+        a medida que cada proceso termina una página. Se puede pasar a AsyncDataSaver.save_stream.
+        """
+        loop = asyncio.get_running_loop()
+        executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        manager = Manager()
+        batches = manager.Queue(maxsize=self.queue_size)
+        pending = {loop.run_in_executor(executor, crawl_site, site, self.options, batches)
+                   for site in self.sites}
+
+        try:
+            # Un proceso envía todos sus lotes antes de terminar: cuando no queda ninguno en
+            # marcha y la cola está vacía, ya se recibió todo
+            while pending or not batches.empty():
+                try:
+                    rows = await loop.run_in_executor(None, batches.get, True, BATCH_POLL_SECONDS)
+                except queue.Empty:
+                    rows = None
+                if rows:
+                    rows = self.assign_tag_ids(rows)
+                    for start in range(0, len(rows), self.batch_size):
+                        yield rows[start:start + self.batch_size]
+
+                for future in [future for future in pending if future.done()]:
+                    pending.discard(future)
+                    name, _, crawl_state, metrics_snapshot = future.result()
+                    self.metrics.merge(metrics_snapshot)
+                    if crawl_state is not None:
+                        self.crawl_states[name] = crawl_state
+        finally:
+            # Si el consumidor se detiene antes de tiempo o un proceso falla, los sitios que quedan
+            # se cancelan y sus errores se descartan
+            for future in pending:
+                future.cancel()
+                future.add_done_callback(lambda future: future.cancelled() or future.exception())
+            # El cierre espera a los procesos: se hace fuera del bucle de eventos y, si quedan
+            # sitios en marcha, sin esperarlos
+            await loop.run_in_executor(None, shutdown_pool, executor, manager, not pending)
+
+    async def crawl(self):
+        """Scraping de todos los sitios; devuelve los DataFrames (frases_df, tags_df) unidos."""
+        rows = []
+        async for batch in self.aiter_quotes():
+            rows.extend(batch)
+        frases_df = pd.DataFrame(rows, columns=FRASES_COLUMNS)
+        tags_df = pd.DataFrame(list(self.tags_dict.items()), columns=['tag_texto', 'tag_id'])
+        return frases_df, tags_df
+
+    def save_state(self):
+        """Guarda el estado incremental de cada sitio (llamar cuando los datos ya están escritos)."""
+        for crawl_state in self.crawl_states.values():
+            crawl_state.save()
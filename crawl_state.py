@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+
+
+def fingerprint(content):
+    """Calcula una huella estable (sha256) de cualquier contenido serializable a JSON."""
+    serialized = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+class CrawlState:
+    """
+    Estado del scraping incremental entre ejecuciones.
+
+    Guarda la huella del bloque de frases de cada página del listado, la de cada frase y la de
+    los detalles de cada autor, además del diccionario de tags con sus IDs para que los IDs se
+    mantengan entre ejecuciones. Con esta información el scraper omite las páginas sin cambios
+    y solo emite las frases nuevas o cuyo autor ha cambiado.
+
+    De cada autor se guarda también una de sus frases: si su página cambia aunque las páginas del
+    listado no lo hagan, el scraper emite esa frase con los detalles nuevos para actualizar el autor.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.pages = {}
+        self.quotes = set()
+        self.authors = {}
+        self.author_quotes = {}
+        self.tags = {}
+        self.next_tag_id = 1
+        self.checked_authors = {}
+        self.skipped_pages = 0
+        if self.path:
+            self.load()
+
+    def page_changed(self, page_url, quotes):
+        """Indica si el bloque de frases de la página es distinto al de la ejecución anterior."""
+        if self.pages.get(page_url) == fingerprint(quotes):
+            self.skipped_pages += 1
+            return False
+        return True
+
+    def mark_page(self, page_url, quotes):
+        """Registra la huella de una página cuyas frases se procesaron por completo."""
+        self.pages[page_url] = fingerprint(quotes)
+
+    def quote_is_new(self, quote):
+        return fingerprint(quote) not in self.quotes
+
+    def mark_quote(self, quote):
+        self.quotes.add(fingerprint(quote))
+
+    def mark_author_quote(self, quote):
+        self.author_quotes[quote['autor_url']] = quote
+
+    def unchecked_authors(self):
+        """Autores conocidos cuyos detalles aún no se comprobaron en esta ejecución."""
+        return [autor_url for autor_url in self.author_quotes if autor_url not in self.checked_authors]
+
+    def author_changed(self, autor_url, details):
+        """
+        Indica si los detalles del autor son nuevos o distintos a los de la ejecución anterior.
+        El resultado se calcula una vez por autor y ejecución.
+        """
+        if autor_url not in self.checked_authors:
+            author_fingerprint = fingerprint(details)
+            self.checked_authors[autor_url] = self.authors.get(autor_url) != author_fingerprint
+            self.authors[autor_url] = author_fingerprint
+        return self.checked_authors[autor_url]
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.pages = state.get('pages', {})
+        self.quotes = set(state.get('quotes', []))
+        self.authors = state.get('authors', {})
+        self.author_quotes = state.get('author_quotes', {})
+        self.tags = state.get('tags', {})
+        self.next_tag_id = state.get('next_tag_id', 1)
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            'pages': self.pages,
+            'quotes': sorted(self.quotes),
+            'authors': self.authors,
+            'author_quotes': self.author_quotes,
+            'tags': self.tags,
+            'next_tag_id': self.next_tag_id
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
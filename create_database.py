@@ -1,14 +1,31 @@
 import asyncpg
 import asyncio
 import db  # Importamos la configuración de la base de datos
+from db_pool import create_pool
+from migrations import MigrationRunner
 
 class AsyncDatabaseManager:
-    def __init__(self, db_name, db_user, db_password, db_host, db_port):
+    def __init__(self, db_name, db_user, db_password, db_host, db_port, pool=None):
         self.db_name = db_name
         self.db_user = db_user
         self.db_password = db_password
         self.db_host = db_host
         self.db_port = db_port
+        # Pool compartido (db_pool.create_pool) para las operaciones sobre la base de datos del proyecto
+        self.pool = pool
+
+    async def acquire(self):
+        """Obtiene una conexión a la base de datos del proyecto, del pool si existe."""
+        if self.pool is not None:
+            return await self.pool.acquire()
+        return await asyncpg.connect(database=self.db_name, user=self.db_user, password=self.db_password,
+                                     host=self.db_host, port=self.db_port)
+
+    async def release(self, conn):
+        if self.pool is not None:
+            await self.pool.release(conn)
+        else:
+            await conn.close()
 
     async def create_database(self):
         try:
@@ -30,54 +47,21 @@ class AsyncDatabaseManager:
             await conn.close()
 
     async def create_tables(self):
+        conn = None
         try:
             # Conexión a la base de datos específica
-            conn = await asyncpg.connect(database=self.db_name, user=self.db_user, password=self.db_password, 
-                                         host=self.db_host, port=self.db_port)
+            conn = await self.acquire()
 
-            # Crear tablas si no existen
-            await conn.execute("""
-            CREATE TABLE IF NOT EXISTS frase (
-                frase_id SERIAL PRIMARY KEY,
-                frase_text TEXT UNIQUE,
-                autor_id INTEGER REFERENCES autor(autor_id),
-                tag_id INTEGER REFERENCES tag(tag_id)                                                          
-            )
-            """)
-            await conn.execute("""
-            CREATE TABLE IF NOT EXISTS autor (
-                autor_id SERIAL PRIMARY KEY,
-                autor_nombre VARCHAR(255),
-                autor_apellido VARCHAR(255),
-                autor_url VARCHAR(255),
-                autor_fecha_nac VARCHAR(255),
-                autor_lugar_nac VARCHAR(255),
-                autor_descripcion TEXT,
-                UNIQUE (autor_nombre, autor_apellido)
-            )
-            """)
-            await conn.execute("""
-            CREATE TABLE IF NOT EXISTS tag (
-                tag_id SERIAL PRIMARY KEY,
-                tag_text VARCHAR(255) UNIQUE
-            )
-            """)
-            await conn.execute("""
-            CREATE TABLE IF NOT EXISTS frase_tag (
-                frase_id INTEGER NOT NULL,
-                tag_id INTEGER NOT NULL,
-                PRIMARY KEY (frase_id, tag_id),  
-                FOREIGN KEY (frase_id) REFERENCES frase(frase_id) ON DELETE CASCADE,
-                FOREIGN KEY (tag_id) REFERENCES tag(tag_id) ON DELETE CASCADE  
-            )
-            """)
+            # Llevar el esquema a la última versión (tablas, correcciones e índices)
+            await MigrationRunner(conn).migrate()
             print("Tablas creadas.")
         
         except asyncpg.PostgresError as e:
             print(f"Error al crear las tablas: {e}")
         
         finally:
-            await conn.close()
+            if conn is not None:
+                await self.release(conn)
 
 async def main():
     # Usamos la configuración importada desde db.py
@@ -91,7 +75,13 @@ async def main():
 
     db_manager = AsyncDatabaseManager(**db_config)
     await db_manager.create_database()
-    await db_manager.create_tables()
+
+    # La base de datos ya existe: el resto de operaciones usan el pool compartido
+    db_manager.pool = await create_pool(**db_config)
+    try:
+        await db_manager.create_tables()
+    finally:
+        await db_manager.pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
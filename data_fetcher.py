@@ -0,0 +1,247 @@
+"""
+Queries of the Streamlit app (app.py): a DataFetcher reads through any connector with a
+fetch_data(query, params) method and caches the results in a QueryCache.
+"""
+import time
+from query_cache import QueryCache
+from quote_index import QuoteIndex
+from text_search import search_query, count_query
+
+# Columnas de la tabla de autores que se pueden proyectar (ver DataFetcher.get_autores)
+AUTOR_COLUMNS = ('autor_id', 'autor_nombre', 'autor_apellido', 'autor_fecha_nac', 'autor_lugar_nac', 'autor_descripcion')
+
+def like_pattern(text):
+    """Builds an ILIKE pattern matching `text` anywhere, escaping the LIKE wildcards it contains."""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+class DataFetcher:
+    def __init__(self, db_connector, cache=None, generation_check_interval=5):
+        self.db_connector = db_connector
+        # Los resultados se comparten entre reruns y sesiones: no se deben modificar los DataFrames
+        self.cache = cache if cache is not None else QueryCache()
+        self.generation_check_interval = generation_check_interval
+        self.last_generation_check = None
+
+    def current_generation(self):
+        """Returns the data generation bumped by DatabaseUpdater, or None if it is not available."""
+        try:
+            df = self.db_connector.fetch_data("SELECT generation FROM data_version WHERE id = 1")
+        except Exception:
+            return None
+        return int(df['generation'].iloc[0]) if not df.empty else None
+
+    def refresh_generation(self):
+        """Invalidates the cache when the data generation changed (checked at most every few seconds)."""
+        now = time.monotonic()
+        if self.last_generation_check is not None and now - self.last_generation_check < self.generation_check_interval:
+            return
+        self.last_generation_check = now
+        self.cache.check_generation(self.current_generation())
+
+    def cached(self, key, loader):
+        """Returns the cached result for the key, loading it with `loader` on a miss."""
+        self.refresh_generation()
+        return self.cache.get_or_load(key, loader)
+
+    def get_data(self):
+        """Fetches and returns data from the database."""
+        return self.get_frases(), self.get_autores(), self.get_tags()
+
+    def get_frases(self):
+        """Fetches all quotes with their author and tags."""
+        return self.cached(('frases',), self._get_frases)
+
+    def _get_frases(self):
+        query = """
+        SELECT frase_id, frase_texto, autor_id, autor_nombre, autor_apellido, autor_url, tags
+        FROM frase_detalle
+        ORDER BY frase_id
+        """
+        return self.db_connector.fetch_data(query)
+
+    def get_quote_index(self):
+        """
+        Returns the in-memory inverted index over all quotes (tag and author -> quotes).
+        It is built once per data generation, since the cache is cleared when it changes.
+        """
+        return self.cached(('quote_index',), lambda: QuoteIndex(self.get_frases()))
+
+    def get_autores(self, columns=None):
+        """
+        Fetches the authors table. `columns` restricts the query to those columns
+        (e.g. only the names for a dropdown, skipping the long descriptions).
+        """
+        columns = tuple(columns) if columns else AUTOR_COLUMNS
+        unknown = set(columns) - set(AUTOR_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown author columns: {', '.join(sorted(unknown))}")
+        return self.cached(('autores', columns), lambda: self._get_autores(columns))
+
+    def _get_autores(self, columns):
+        query = f"""
+        SELECT {', '.join(columns)}
+        FROM autor
+        """
+        return self.db_connector.fetch_data(query)
+
+    def get_tags(self):
+        """Fetches all tags."""
+        return self.cached(('tags',), self._get_tags)
+
+    def _get_tags(self):
+        query = """
+        SELECT tag_id, tag_texto
+        FROM tag
+        """
+        return self.db_connector.fetch_data(query)
+
+    def count_frases(self):
+        """Returns the total number of quotes (cached until the next data refresh)."""
+        return self.cached(('count_frases',), lambda: int(self.db_connector.fetch_data(
+            "SELECT count(*) AS total FROM frase_detalle")['total'].iloc[0]))
+
+    def count_autores(self):
+        """Returns the total number of authors (cached until the next data refresh)."""
+        return self.cached(('count_autores',), lambda: int(self.db_connector.fetch_data(
+            "SELECT count(*) AS total FROM autor")['total'].iloc[0]))
+
+    def get_author_stats(self):
+        """Fetches the number of quotes per author, pre-computed on every data update."""
+        return self.cached(('author_stats',), self._get_author_stats)
+
+    def _get_author_stats(self):
+        query = """
+        SELECT autor_nombre, autor_apellido, frases
+        FROM estadistica_autor
+        ORDER BY frases DESC, autor_apellido, autor_nombre
+        """
+        return self.db_connector.fetch_data(query)
+
+    def get_tag_stats(self):
+        """Fetches the number of quotes per tag, pre-computed on every data update."""
+        return self.cached(('tag_stats',), self._get_tag_stats)
+
+    def _get_tag_stats(self):
+        query = """
+        SELECT tag_texto, frases
+        FROM estadistica_tag
+        ORDER BY frases DESC, tag_texto
+        """
+        return self.db_connector.fetch_data(query)
+
+    def get_frases_page(self, after_id=None, limit=10):
+        """
+        Fetches one page of quotes using keyset pagination: the `limit` quotes with
+        frase_id greater than `after_id`, so every page is a small indexed query.
+        """
+        return self.cached(('frases_page', after_id, limit), lambda: self._get_frases_page(after_id, limit))
+
+    def _get_frases_page(self, after_id, limit):
+        query = """
+        SELECT frase_id, frase_texto, autor_id, autor_nombre, autor_apellido, autor_url, tags
+        FROM frase_detalle
+        WHERE frase_id > %s
+        ORDER BY frase_id
+        LIMIT %s
+        """
+        return self.db_connector.fetch_data(query, params=(after_id or 0, limit))
+
+    def get_autores_page(self, after_id=None, limit=10):
+        """Fetches one page of authors using keyset pagination on autor_id."""
+        return self.cached(('autores_page', after_id, limit), lambda: self._get_autores_page(after_id, limit))
+
+    def _get_autores_page(self, after_id, limit):
+        query = f"""
+        SELECT {', '.join(AUTOR_COLUMNS)}
+        FROM autor
+        WHERE autor_id > %s
+        ORDER BY autor_id
+        LIMIT %s
+        """
+        return self.db_connector.fetch_data(query, params=(after_id or 0, limit))
+
+    def get_quotes_by_author_id(self, author_id):
+        """Fetches quotes by a specific author ID."""
+        return self.cached(('get_quotes_by_author_id', author_id), lambda: self._get_quotes_by_author_id(author_id))
+
+    def _get_quotes_by_author_id(self, author_id):
+        query = """
+        SELECT frase_texto, autor_nombre, autor_apellido, autor_url, tags
+        FROM frase_detalle
+        WHERE autor_id = %s
+        """
+        return self.db_connector.fetch_data(query, params=(int(author_id),))
+
+    def get_quotes_by_author(self, author_name):
+        """Fetches quotes by a specific author."""
+        return self.cached(('get_quotes_by_author', author_name), lambda: self._get_quotes_by_author(author_name))
+
+    def _get_quotes_by_author(self, author_name):
+        # El ILIKE se hace sobre la tabla autor (índices de trigramas) y frase_detalle se lee por autor_id
+        query = """
+        SELECT frase_texto, autor_nombre, autor_apellido, autor_url, tags
+        FROM frase_detalle
+        WHERE autor_id IN (SELECT autor_id FROM autor
+                           WHERE autor_nombre ILIKE %(pattern)s OR autor_apellido ILIKE %(pattern)s)
+        """
+        return self.db_connector.fetch_data(query, params={'pattern': like_pattern(author_name)})
+
+    def get_quotes_by_tag(self, tag_text):
+        """Fetches quotes by a specific tag."""
+        return self.cached(('get_quotes_by_tag', tag_text), lambda: self._get_quotes_by_tag(tag_text))
+
+    def _get_quotes_by_tag(self, tag_text):
+        # Los tags que coinciden salen de la tabla tag (índice de trigramas); tags && ... usa el índice GIN
+        query = """
+        SELECT frase_texto, autor_nombre, autor_apellido, autor_url, tags
+        FROM frase_detalle
+        WHERE tags && ARRAY(SELECT tag_texto::text FROM tag WHERE tag_texto ILIKE %s)
+        """
+        return self.db_connector.fetch_data(query, params=(like_pattern(tag_text),))
+
+    def search_quotes(self, search_text, offset=0, limit=10):
+        """
+        Full-text search over the quote text and the author name, ranked with ts_rank.
+        The match uses the GIN index on frase_detalle.documento; only the matches are ranked.
+        """
+        return self.cached(('search_quotes', search_text, offset, limit),
+                           lambda: self._search_quotes(search_text, offset, limit))
+
+    def _search_quotes(self, search_text, offset, limit):
+        query, params = search_query(search_text, offset, limit)
+        return self.db_connector.fetch_data(query, params=params)
+
+    def count_search_results(self, search_text):
+        """Returns the number of quotes matching a full-text search."""
+        return self.cached(('count_search_results', search_text), lambda: self._count_search_results(search_text))
+
+    def _count_search_results(self, search_text):
+        query, params = count_query(search_text)
+        return int(self.db_connector.fetch_data(query, params=params)['total'].iloc[0])
+
+    def get_quotes_with_tag(self, tag_text):
+        """Fetches quotes that have exactly the given tag."""
+        return self.cached(('get_quotes_with_tag', tag_text), lambda: self._get_quotes_with_tag(tag_text))
+
+    def _get_quotes_with_tag(self, tag_text):
+        # tags @> ARRAY[...] se resuelve con el índice GIN de frase_detalle
+        query = """
+        SELECT frase_texto, autor_nombre, autor_apellido, autor_url, tags
+        FROM frase_detalle
+        WHERE tags @> ARRAY[%s]::text[]
+        """
+        return self.db_connector.fetch_data(query, params=(tag_text,))
+
+
+def has_next_page(current_page, total_pages, page_df):
+    """Whether there is a page after `current_page` (an empty page means the data shrank meanwhile)."""
+    return current_page < total_pages and not page_df.empty
+
+
+def next_page_cursors(cursors, current_page, page_df, id_column):
+    """
+    Returns the keyset cursors after moving forward from `current_page`: cursors[n - 1] is the
+    after_id of page n, and the last id of the current page becomes the cursor of the next one.
+    """
+    return cursors[:current_page] + [int(page_df[id_column].iloc[-1])]
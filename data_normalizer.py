@@ -0,0 +1,55 @@
+from collections import namedtuple
+import pandas as pd
+
+AUTOR_COLUMNS = ['autor_nombre', 'autor_apellido', 'autor_url', 'autor_fecha_nac', 'autor_lugar_nac', 'autor_descripcion']
+FRASE_COLUMNS = ['frase_texto', 'autor_nombre', 'autor_apellido']
+FRASE_TAG_COLUMNS = ['frase_texto', 'tag_id']
+TAG_COLUMNS = ['tag_id', 'tag_texto']
+
+# Conjuntos de entidades distintas listos para escribir, uno por tabla
+NormalizedData = namedtuple('NormalizedData', ['autores', 'tags', 'frases', 'frase_tags'])
+
+
+class DataNormalizer:
+    """
+    Etapa intermedia entre el scraper y AsyncDataSaver.
+
+    El DataFrame de frases tiene una fila por frase y repite los datos del autor en cada una.
+    El normalizador construye, con operaciones vectorizadas de pandas, los conjuntos distintos de
+    autores, tags, frases y relaciones frase-tag, de modo que cada entidad se escribe una sola vez.
+    Ante duplicados se conserva la última aparición, igual que ocurría con los upserts fila a fila.
+    """
+
+    @staticmethod
+    def normalize(frases_df, tags_df):
+        if frases_df.empty:
+            autores = pd.DataFrame(columns=AUTOR_COLUMNS)
+            frases = pd.DataFrame(columns=FRASE_COLUMNS)
+            frase_tags = pd.DataFrame(columns=FRASE_TAG_COLUMNS)
+        else:
+            autores = (frases_df[AUTOR_COLUMNS]
+                       .drop_duplicates(subset=['autor_nombre', 'autor_apellido'], keep='last')
+                       .reset_index(drop=True))
+            autores['autor_descripcion'] = autores['autor_descripcion'].str.strip()
+
+            frases = (frases_df[FRASE_COLUMNS]
+                      .drop_duplicates(subset='frase_texto', keep='last')
+                      .reset_index(drop=True))
+
+            frase_tags = (frases_df[['frase_texto', 'Tags_IDs']]
+                          .explode('Tags_IDs')
+                          .dropna(subset=['Tags_IDs'])
+                          .rename(columns={'Tags_IDs': 'tag_id'})
+                          .astype({'tag_id': 'int64'})
+                          .drop_duplicates()
+                          .reset_index(drop=True))
+
+        if tags_df.empty:
+            tags = pd.DataFrame(columns=TAG_COLUMNS)
+        else:
+            tags = (tags_df[TAG_COLUMNS]
+                    .astype({'tag_id': 'int64'})
+                    .drop_duplicates(subset='tag_id', keep='last')
+                    .reset_index(drop=True))
+
+        return NormalizedData(autores=autores, tags=tags, frases=frases, frase_tags=frase_tags)
@@ -0,0 +1,17 @@
+import asyncpg
+
+
+async def create_pool(db_name, db_user, db_password, db_host, db_port, min_size=1, max_size=10):
+    """
+    Crea el pool de conexiones asyncpg que comparten DatabaseUpdater, AsyncDataSaver y
+    AsyncDatabaseManager, para no abrir y cerrar una conexión nueva en cada operación.
+    """
+    return await asyncpg.create_pool(
+        database=db_name,
+        user=db_user,
+        password=db_password,
+        host=db_host,
+        port=db_port,
+        min_size=min_size,
+        max_size=max_size
+    )
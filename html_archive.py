@@ -0,0 +1,175 @@
+"""
+Archivo comprimido de las respuestas HTTP del scraper, para volver a ejecutar la extracción sin
+volver a descargar el sitio.
+
+Las respuestas (URL, estado, cabeceras y cuerpo) se añaden a segmentos de solo escritura al final,
+segment-00001.<códec>, segment-00002.<códec>, ..., con cada registro comprimido por separado (como
+en WARC) para poder leerlo directamente con su posición. index.jsonl guarda, por registro, la URL,
+el segmento, la posición y la longitud; la última entrada de una URL es la vigente.
+
+El códec es zstd si está instalado el paquete zstandard (opcional) y zlib en otro caso; cada
+entrada del índice guarda el suyo, así que un archivo puede mezclar ambos.
+
+Se archiva la respuesta final de cada petición, también las de error, para que el replay se
+comporte como la descarga original. Mientras se archiva, las URLs que aún no están en el archivo
+se piden sin cabeceras condicionales: un 304 no trae cuerpo que guardar. En replay, una URL que
+falta en el archivo lanza MissingResponse en lugar de darse por el final del listado.
+
+Uso para reprocesar un scraping archivado, desde el directorio raíz:
+    python html_archive.py <directorio del archivo> [URL base]
+"""
+from collections import namedtuple
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstandard es opcional: sin él se usa zlib
+    zstandard = None
+
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+INDEX_FILE = 'index.jsonl'
+
+ArchivedResponse = namedtuple('ArchivedResponse', ['url', 'status', 'headers', 'text', 'fetched_at'])
+
+
+class MissingResponse(LookupError):
+    """La URL pedida durante un replay no está en el archivo."""
+
+
+def default_codec():
+    return 'zstd' if zstandard is not None else 'zlib'
+
+
+def compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("Este archivo usa zstd: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class ResponseArchive:
+    """
+    Archivo de respuestas en un directorio: segmentos comprimidos de solo escritura al final más
+    un índice de posiciones. Es seguro usarlo desde varios hilos de un mismo proceso.
+    """
+
+    def __init__(self, path, codec=None, segment_size=DEFAULT_SEGMENT_SIZE):
+        self.path = path
+        self.codec = codec or default_codec()
+        if self.codec not in ('zstd', 'zlib'):
+            raise ValueError(f"Códec desconocido: {self.codec}")
+        if self.codec == 'zstd' and zstandard is None:
+            raise ImportError("El códec zstd necesita el paquete zstandard: pip install zstandard")
+        self.segment_size = segment_size
+        self.index = {}
+        self.segment_number = 0
+        self.segment_file = None
+        self.index_file = None
+        self.lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        self.load_index()
+
+    def load_index(self):
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Una línea incompleta solo puede ser la última, si se cortó la escritura
+                    continue
+                self.index[entry['url']] = entry
+                self.segment_number = max(self.segment_number, entry['segment'])
+
+    def segment_path(self, segment_number, codec):
+        return os.path.join(self.path, f"segment-{segment_number:05d}.{codec}")
+
+    def open_segment(self):
+        """Devuelve el segmento en el que escribir, empezando uno nuevo si el actual está lleno."""
+        if self.segment_file is not None and self.segment_file.tell() < self.segment_size:
+            return self.segment_file
+        if self.segment_file is not None:
+            self.segment_file.close()
+        self.segment_number += 1
+        self.segment_file = open(self.segment_path(self.segment_number, self.codec), 'ab')
+        return self.segment_file
+
+    def append(self, url, status, headers, text):
+        """Añade una respuesta al archivo."""
+        header = {'url': url, 'status': status, 'headers': dict(headers), 'fetched_at': time.time()}
+        record = compress(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n' + text.encode('utf-8'),
+                          self.codec)
+
+        with self.lock:
+            segment = self.open_segment()
+            offset = segment.tell()
+            segment.write(record)
+            segment.flush()
+
+            # El índice se escribe después del registro: nunca apunta a datos incompletos
+            entry = {'url': url, 'segment': self.segment_number, 'offset': offset, 'length': len(record),
+                     'codec': self.codec, 'status': status}
+            if self.index_file is None:
+                self.index_file = open(os.path.join(self.path, INDEX_FILE), 'a', encoding='utf-8')
+            self.index_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.index_file.flush()
+            self.index[url] = entry
+
+    def get(self, url):
+        """Devuelve la última respuesta archivada de la URL o None si no está."""
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        with open(self.segment_path(entry['segment'], entry['codec']), 'rb') as f:
+            f.seek(entry['offset'])
+            data = decompress(f.read(entry['length']), entry['codec'])
+        header, body = data.split(b'\n', 1)
+        header = json.loads(header)
+        return ArchivedResponse(header['url'], header['status'], header['headers'], body.decode('utf-8'),
+                                header['fetched_at'])
+
+    def urls(self):
+        return list(self.index)
+
+    def __contains__(self, url):
+        return url in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        with self.lock:
+            for f in (self.segment_file, self.index_file):
+                if f is not None:
+                    f.close()
+            self.segment_file = None
+            self.index_file = None
+
+
+if __name__ == "__main__":
+    from scraper import Scraper
+
+    archive_path = sys.argv[1]
+    base_url = sys.argv[2] if len(sys.argv) > 2 else "https://quotes.toscrape.com/"
+    archive = ResponseArchive(archive_path)
+
+    start = time.perf_counter()
+    scraper = Scraper(base_url, replay=archive, parser='lxml')
+    frases_df, tags_df = scraper.scrape_quotes()
+    scraper.close()
+    print(f"{len(frases_df)} frases y {len(tags_df)} tags reprocesados desde {len(archive)} respuestas "
+          f"en {time.perf_counter() - start:.2f} segundos")
@@ -0,0 +1,69 @@
+import json
+import os
+
+
+class ConditionalCache:
+    """
+    Guarda por URL los validadores HTTP (ETag y Last-Modified) de la última respuesta junto con
+    el resultado ya procesado de esa página.
+
+    Con ellos el scraper envía peticiones condicionales (If-None-Match / If-Modified-Since): si el
+    servidor responde 304 se reutiliza el resultado guardado y la página no se vuelve a procesar.
+    Si se indica una ruta, la caché se conserva en disco entre ejecuciones.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.not_modified = 0
+        if self.path:
+            self.load()
+
+    def conditional_headers(self, url):
+        """Devuelve las cabeceras condicionales para la URL (vacías si no hay validadores)."""
+        entry = self.entries.get(url)
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def __contains__(self, url):
+        """Indica si hay validadores de la URL, es decir, si se puede pedir de forma condicional."""
+        return url in self.entries
+
+    def get_parsed(self, url):
+        entry = self.entries.get(url)
+        return entry['parsed'] if entry is not None else None
+
+    def store(self, url, response_headers, parsed):
+        """Guarda el resultado procesado si la respuesta trae algún validador."""
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            self.entries.pop(url, None)
+            return
+        self.entries[url] = {'etag': etag, 'last_modified': last_modified, 'parsed': parsed}
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,64 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_DIR = 'logs'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Nivel por defecto; con DEBUG se registran también los mensajes por frase y por autor
+LOG_LEVEL = logging.INFO
+
+# Listeners activos por (proceso, logger): los manejadores se instalan una sola vez por proceso
+_listeners = {}
+_lock = threading.Lock()
+
+
+def shutdown_logging(name=None):
+    """Detiene los listeners de este proceso (o solo el de `name`), escribiendo lo que quede en cola."""
+    with _lock:
+        for key in [key for key in _listeners if key[0] == os.getpid() and name in (None, key[1])]:
+            listener, queue_handler = _listeners.pop(key)
+            logging.getLogger(key[1]).removeHandler(queue_handler)
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+
+atexit.register(shutdown_logging)
+
+
+def setup_logging(name, log_dir=LOG_DIR, level=LOG_LEVEL):
+    """
+    Configura el logger `name` para escribir en log_dir/<name>.log sin bloquear a quien registra.
+
+    El logger solo tiene un QueueHandler que deja los registros en una cola; un QueueListener
+    los escribe en el fichero desde su propio hilo. La configuración se hace una vez por proceso:
+    las llamadas siguientes devuelven el mismo logger sin añadir manejadores. En un proceso hijo
+    creado con fork se sustituye el QueueHandler heredado, cuyo listener no existe en el hijo.
+    """
+    logger = logging.getLogger(name)
+    key = (os.getpid(), name)
+
+    with _lock:
+        if key in _listeners:
+            return logger
+
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.FileHandler(os.path.join(log_dir, f'{name}.log'), encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+
+        for handler in list(logger.handlers):
+            if isinstance(handler, QueueHandler):
+                logger.removeHandler(handler)
+        queue_handler = QueueHandler(log_queue)
+        logger.addHandler(queue_handler)
+        logger.setLevel(level)
+        _listeners[key] = (listener, queue_handler)
+
+    return logger
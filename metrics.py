@@ -0,0 +1,151 @@
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+
+# Límites superiores (en segundos) de los buckets de los histogramas
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+def _labels_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels_key, extra=()):
+    pairs = list(labels_key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metrics:
+    """
+    Registro de métricas de una ejecución: contadores e histogramas con etiquetas.
+
+    Lo comparten el scraper, AsyncDataSaver y DatabaseUpdater para medir por separado la red,
+    el procesamiento del HTML y PostgreSQL. Se exporta en formato de texto de Prometheus
+    (to_prometheus / serve) o como JSON (dump_json). Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    histogram['counts'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mide la duración del bloque y la añade al histograma `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """Copia serializable de las métricas (por ejemplo, para enviarlas desde otro proceso)."""
+        with self.lock:
+            return {
+                'buckets': list(self.buckets),
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in self.counters.items()],
+                'histograms': [{'name': name, 'labels': dict(labels), 'counts': list(histogram['counts']),
+                                'sum': histogram['sum'], 'count': histogram['count']}
+                               for (name, labels), histogram in self.histograms.items()]
+            }
+
+    def merge(self, snapshot):
+        """Suma a este registro las métricas de un snapshot con los mismos buckets."""
+        if tuple(snapshot['buckets']) != self.buckets:
+            raise ValueError("Los buckets del snapshot no coinciden")
+        for counter in snapshot['counters']:
+            self.inc(counter['name'], counter['value'], **counter['labels'])
+        with self.lock:
+            for entry in snapshot['histograms']:
+                key = (entry['name'], _labels_key(entry['labels']))
+                histogram = self.histograms.setdefault(
+                    key, {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+                histogram['counts'] = [a + b for a, b in zip(histogram['counts'], entry['counts'])]
+                histogram['sum'] += entry['sum']
+                histogram['count'] += entry['count']
+
+    def to_prometheus(self):
+        """Métricas en el formato de texto de exposición de Prometheus."""
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f'# TYPE {name} counter')
+                for (metric, labels), value in sorted(self.counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_format_labels(labels)} {value}')
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, labels), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    for upper_bound, count in zip(self.buckets, histogram['counts']):
+                        lines.append(f'{name}_bucket{_format_labels(labels, [("le", str(upper_bound))])} {count}')
+                    lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {histogram["count"]}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {histogram["sum"]}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def dump_json(self, path):
+        """Guarda el snapshot de las métricas en un fichero JSON."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Expone las métricas en http://host:port/metrics desde un hilo en segundo plano."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        return httpd
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import sys
+import asyncpg
+
+# Migraciones del esquema, en orden. Cada una se aplica una sola vez, en su propia transacción,
+# y queda registrada en la tabla schema_migrations.
+MIGRATIONS = [
+    (1, 'esquema_inicial', """
+    CREATE TABLE IF NOT EXISTS autor (
+        autor_id SERIAL PRIMARY KEY,
+        autor_nombre VARCHAR(255),
+        autor_apellido VARCHAR(255),
+        autor_url VARCHAR(255),
+        autor_fecha_nac VARCHAR(255),
+        autor_lugar_nac VARCHAR(255),
+        autor_descripcion TEXT,
+        UNIQUE (autor_nombre, autor_apellido)
+    );
+    CREATE TABLE IF NOT EXISTS tag (
+        tag_id SERIAL PRIMARY KEY,
+        tag_texto VARCHAR(255) UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS frase (
+        frase_id SERIAL PRIMARY KEY,
+        frase_texto TEXT UNIQUE,
+        autor_id INTEGER REFERENCES autor(autor_id)
+    );
+    CREATE TABLE IF NOT EXISTS frase_tag (
+        frase_id INTEGER NOT NULL,
+        tag_id INTEGER NOT NULL,
+        PRIMARY KEY (frase_id, tag_id),
+        FOREIGN KEY (frase_id) REFERENCES frase(frase_id) ON DELETE CASCADE,
+        FOREIGN KEY (tag_id) REFERENCES tag(tag_id) ON DELETE CASCADE
+    );
+    CREATE TABLE IF NOT EXISTS data_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    INSERT INTO data_version (id, generation) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+    """),
+    # Las bases de datos creadas con el DDL anterior usaban frase_text / tag_text y una
+    # columna frase.tag_id que nunca se rellenaba; se alinean con lo que usan el saver y la app
+    (2, 'corregir_columnas', """
+    DO $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = current_schema() AND table_name = 'frase' AND column_name = 'frase_text') THEN
+            ALTER TABLE frase RENAME COLUMN frase_text TO frase_texto;
+        END IF;
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = current_schema() AND table_name = 'tag' AND column_name = 'tag_text') THEN
+            ALTER TABLE tag RENAME COLUMN tag_text TO tag_texto;
+        END IF;
+    END $$;
+    ALTER TABLE frase DROP COLUMN IF EXISTS tag_id;
+    """),
+    # Índices para los patrones de consulta de la app: filtros por autor, unión de frase_tag
+    # por tag y búsquedas ILIKE '%...%' (trigramas)
+    (3, 'indices_consultas', """
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS frase_autor_id_idx ON frase (autor_id);
+    CREATE INDEX IF NOT EXISTS frase_tag_tag_id_idx ON frase_tag (tag_id, frase_id);
+    CREATE INDEX IF NOT EXISTS autor_nombre_trgm_idx ON autor USING gin (autor_nombre gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS autor_apellido_trgm_idx ON autor USING gin (autor_apellido gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS tag_texto_trgm_idx ON tag USING gin (tag_texto gin_trgm_ops);
+    """),
+    # Vista con una fila por frase, los datos del autor y sus tags como text[]: la unión de cuatro
+    # tablas con array_agg se calcula una vez por actualización (ver DatabaseUpdater.refresh_views)
+    # y no en cada consulta de la app. El índice único permite REFRESH ... CONCURRENTLY.
+    (4, 'vista_frase_detalle', """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS frase_detalle AS
+    SELECT frase.frase_id, frase.frase_texto,
+           autor.autor_id, autor.autor_nombre, autor.autor_apellido, autor.autor_url,
+           COALESCE(array_agg(tag.tag_texto::text ORDER BY tag.tag_texto) FILTER (WHERE tag.tag_id IS NOT NULL),
+                    '{}'::text[]) AS tags
+    FROM frase
+    JOIN autor ON frase.autor_id = autor.autor_id
+    LEFT JOIN frase_tag ON frase.frase_id = frase_tag.frase_id
+    LEFT JOIN tag ON frase_tag.tag_id = tag.tag_id
+    GROUP BY frase.frase_id, autor.autor_id;
+    CREATE UNIQUE INDEX IF NOT EXISTS frase_detalle_frase_id_idx ON frase_detalle (frase_id);
+    CREATE INDEX IF NOT EXISTS frase_detalle_autor_id_idx ON frase_detalle (autor_id);
+    CREATE INDEX IF NOT EXISTS frase_detalle_tags_idx ON frase_detalle USING gin (tags);
+    """),
+    # Agregados de la página de estadísticas, recalculados en cada actualización junto a frase_detalle
+    (5, 'estadisticas', """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS estadistica_autor AS
+    SELECT autor.autor_id, autor.autor_nombre, autor.autor_apellido, count(*) AS frases
+    FROM frase
+    JOIN autor ON frase.autor_id = autor.autor_id
+    GROUP BY autor.autor_id;
+    CREATE UNIQUE INDEX IF NOT EXISTS estadistica_autor_autor_id_idx ON estadistica_autor (autor_id);
+    CREATE MATERIALIZED VIEW IF NOT EXISTS estadistica_tag AS
+    SELECT tag.tag_id, tag.tag_texto, count(*) AS frases
+    FROM frase_tag
+    JOIN tag ON frase_tag.tag_id = tag.tag_id
+    GROUP BY tag.tag_id;
+    CREATE UNIQUE INDEX IF NOT EXISTS estadistica_tag_tag_id_idx ON estadistica_tag (tag_id);
+    """),
+    # Búsqueda de texto libre. El documento une la frase (peso A) y el nombre del autor (peso B);
+    # como el autor está en otra tabla no puede ser una columna generada de frase, así que se
+    # guarda en frase_detalle, que se recrea con la columna y su índice GIN.
+    (6, 'busqueda_texto', """
+    DROP MATERIALIZED VIEW IF EXISTS frase_detalle;
+    CREATE MATERIALIZED VIEW frase_detalle AS
+    SELECT frase.frase_id, frase.frase_texto,
+           autor.autor_id, autor.autor_nombre, autor.autor_apellido, autor.autor_url,
+           COALESCE(array_agg(tag.tag_texto::text ORDER BY tag.tag_texto) FILTER (WHERE tag.tag_id IS NOT NULL),
+                    '{}'::text[]) AS tags,
+           setweight(to_tsvector('english', coalesce(frase.frase_texto, '')), 'A') ||
+           setweight(to_tsvector('simple', coalesce(autor.autor_nombre, '') || ' ' || coalesce(autor.autor_apellido, '')), 'B')
+               AS documento
+    FROM frase
+    JOIN autor ON frase.autor_id = autor.autor_id
+    LEFT JOIN frase_tag ON frase.frase_id = frase_tag.frase_id
+    LEFT JOIN tag ON frase_tag.tag_id = tag.tag_id
+    GROUP BY frase.frase_id, autor.autor_id;
+    CREATE UNIQUE INDEX frase_detalle_frase_id_idx ON frase_detalle (frase_id);
+    CREATE INDEX frase_detalle_autor_id_idx ON frase_detalle (autor_id);
+    CREATE INDEX frase_detalle_tags_idx ON frase_detalle USING gin (tags);
+    CREATE INDEX frase_detalle_documento_idx ON frase_detalle USING gin (documento);
+    """),
+    # El nombre del autor se indexaba con 'simple' pero las búsquedas usan 'english' (ver
+    # text_search.SEARCH_CONFIG): los apellidos que cambian al aplicar stemming ('Dickens' ->
+    # 'dicken') no coincidían nunca. Todo el documento usa ahora la misma configuración.
+    (7, 'busqueda_autor_english', """
+    DROP MATERIALIZED VIEW IF EXISTS frase_detalle;
+    CREATE MATERIALIZED VIEW frase_detalle AS
+    SELECT frase.frase_id, frase.frase_texto,
+           autor.autor_id, autor.autor_nombre, autor.autor_apellido, autor.autor_url,
+           COALESCE(array_agg(tag.tag_texto::text ORDER BY tag.tag_texto) FILTER (WHERE tag.tag_id IS NOT NULL),
+                    '{}'::text[]) AS tags,
+           setweight(to_tsvector('english', coalesce(frase.frase_texto, '')), 'A') ||
+           setweight(to_tsvector('english', coalesce(autor.autor_nombre, '') || ' ' || coalesce(autor.autor_apellido, '')), 'B')
+               AS documento
+    FROM frase
+    JOIN autor ON frase.autor_id = autor.autor_id
+    LEFT JOIN frase_tag ON frase.frase_id = frase_tag.frase_id
+    LEFT JOIN tag ON frase_tag.tag_id = tag.tag_id
+    GROUP BY frase.frase_id, autor.autor_id;
+    CREATE UNIQUE INDEX frase_detalle_frase_id_idx ON frase_detalle (frase_id);
+    CREATE INDEX frase_detalle_autor_id_idx ON frase_detalle (autor_id);
+    CREATE INDEX frase_detalle_tags_idx ON frase_detalle USING gin (tags);
+    CREATE INDEX frase_detalle_documento_idx ON frase_detalle USING gin (documento);
+    """),
+]
+
+# Consultas frecuentes de la app (las de DataFetcher en data_fetcher.py, con valores de ejemplo) y los
+# índices que deben resolver cada una
+HOT_QUERIES = [
+    ('pagina_frases', "SELECT frase_texto FROM frase_detalle WHERE frase_id > 10 ORDER BY frase_id LIMIT 10",
+     ('frase_detalle_frase_id_idx',)),
+    ('pagina_autores', "SELECT autor_nombre FROM autor WHERE autor_id > 10 ORDER BY autor_id LIMIT 10",
+     ('autor_pkey',)),
+    ('frases_por_autor_id', "SELECT frase_texto FROM frase_detalle WHERE autor_id = 1",
+     ('frase_detalle_autor_id_idx',)),
+    ('frases_por_autor', """SELECT frase_texto FROM frase_detalle
+     WHERE autor_id IN (SELECT autor_id FROM autor WHERE autor_nombre ILIKE '%ein%' OR autor_apellido ILIKE '%ein%')""",
+     ('autor_nombre_trgm_idx', 'autor_apellido_trgm_idx', 'frase_detalle_autor_id_idx')),
+    ('frases_por_tag', """SELECT frase_texto FROM frase_detalle
+     WHERE tags && ARRAY(SELECT tag_texto::text FROM tag WHERE tag_texto ILIKE '%lov%')""",
+     ('tag_texto_trgm_idx', 'frase_detalle_tags_idx')),
+    ('frases_con_tag', "SELECT frase_texto FROM frase_detalle WHERE tags @> ARRAY['love']::text[]",
+     ('frase_detalle_tags_idx',)),
+    ('busqueda_texto', "SELECT frase_texto FROM frase_detalle WHERE documento @@ websearch_to_tsquery('english', 'love')",
+     ('frase_detalle_documento_idx',)),
+]
+
+
+def plan_indexes(plan):
+    """Devuelve los nombres de los índices que aparecen en un plan de EXPLAIN (FORMAT JSON)."""
+    indexes = set()
+    if 'Index Name' in plan:
+        indexes.add(plan['Index Name'])
+    for child in plan.get('Plans', []):
+        indexes |= plan_indexes(child)
+    return indexes
+
+
+class MigrationRunner:
+    """
+    Aplica las migraciones pendientes del esquema y comprueba con EXPLAIN que las consultas
+    frecuentes de la app se resuelven con los índices previstos.
+    """
+
+    def __init__(self, conn, migrations=MIGRATIONS):
+        self.conn = conn
+        self.migrations = migrations
+
+    async def applied_versions(self):
+        await self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """)
+        rows = await self.conn.fetch("SELECT version FROM schema_migrations")
+        return {row['version'] for row in rows}
+
+    async def migrate(self):
+        """Aplica en orden las migraciones que faltan y devuelve las versiones aplicadas."""
+        applied = await self.applied_versions()
+        newly_applied = []
+
+        for version, name, sql in sorted(self.migrations):
+            if version in applied:
+                continue
+            async with self.conn.transaction():
+                await self.conn.execute(sql)
+                await self.conn.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)", version, name)
+            print(f"Migración {version} ({name}) aplicada.")
+            newly_applied.append(version)
+
+        return newly_applied
+
+    async def check_indexes(self, hot_queries=HOT_QUERIES):
+        """
+        Ejecuta EXPLAIN sobre cada consulta frecuente y devuelve {nombre: (índices esperados, usados)}.
+        Se desactiva el seq scan durante la comprobación para que el resultado no dependa del
+        tamaño actual de las tablas (con pocas filas el planificador siempre prefiere leerlas enteras).
+        """
+        results = {}
+        async with self.conn.transaction():
+            await self.conn.execute("SET LOCAL enable_seqscan = off")
+            for name, query, expected_indexes in hot_queries:
+                plan_json = await self.conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}")
+                plan = json.loads(plan_json)[0]['Plan'] if isinstance(plan_json, str) else plan_json[0]['Plan']
+                results[name] = (expected_indexes, set(expected_indexes) <= plan_indexes(plan))
+        return results
+
+
+async def main(check=False):
+    import db  # Configuración de la base de datos (solo necesaria al ejecutar el script)
+
+    conn = await asyncpg.connect(database=db.DB_NAME, user=db.DB_USER, password=db.DB_PASSWORD,
+                                 host=db.DB_HOST, port=db.DB_PORT)
+    try:
+        runner = MigrationRunner(conn)
+        await runner.migrate()
+        if check:
+            results = await runner.check_indexes()
+            for name, (expected_indexes, used) in results.items():
+                print(f"{name}: {'OK' if used else 'NO USA'} {', '.join(expected_indexes)}")
+            if not all(used for _, used in results.values()):
+                sys.exit(1)
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(main(check='--check' in sys.argv))
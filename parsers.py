@@ -0,0 +1,137 @@
+from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+
+
+class SoupParser:
+    """
+    Parser basado en BeautifulSoup: construye el árbol completo del documento y lo recorre
+    con find/find_all. Es el comportamiento original del scraper y solo admite la estructura
+    de quotes.toscrape.com; para otros sitios se usa LxmlParser con sus selectores.
+    """
+
+    def __init__(self, logger, selectors=None):
+        if selectors:
+            raise ValueError("SoupParser no admite selectores propios; usa el parser 'lxml'")
+        self.logger = logger
+
+    def parse_quotes(self, html, base_url):
+        soup = BeautifulSoup(html, 'lxml')
+        quotes = []
+
+        for frase in soup.find_all('div', attrs={'class': 'quote'}):
+            try:
+                quotes.append({
+                    'frase_texto': frase.find('span', class_='text').get_text(),
+                    'autor_nombre_completo': frase.find('small', class_='author').get_text(),
+                    'autor_url': base_url + frase.find('a')['href'],
+                    'tags': [tag.get_text() for tag in frase.find_all('a', class_='tag')]
+                })
+            except Exception as e:
+                self.logger.error("Error al procesar una frase: %s", e)
+
+        return quotes
+
+    def parse_author(self, html):
+        autor_soup = BeautifulSoup(html, 'lxml')
+
+        born_date = autor_soup.find('span', class_='author-born-date')
+        born_location = autor_soup.find('span', class_='author-born-location')
+        description = autor_soup.find('div', class_='author-description')
+
+        return {
+            'author-born-date': born_date.get_text() if born_date else '',
+            'author-born-location': born_location.get_text() if born_location else '',
+            'author-description': description.get_text() if description else ''
+        }
+
+
+def _has_class(name):
+    # Equivalente en XPath 1.0 al selector CSS .name (la clase puede ir junto a otras)
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Expresiones XPath de LxmlParser para la estructura de quotes.toscrape.com. Las de cada frase
+# son relativas al nodo de la frase; un sitio distinto puede sustituir cualquiera de ellas.
+DEFAULT_SELECTORS = {
+    'quotes': f"//div[{_has_class('quote')}]",
+    'quote_text': f".//span[{_has_class('text')}]",
+    'quote_author': f".//small[{_has_class('author')}]",
+    'quote_link': "(.//a)[1]/@href",
+    'quote_tags': f".//a[{_has_class('tag')}]",
+    'author_born_date': f"(//span[{_has_class('author-born-date')}])[1]",
+    'author_born_location': f"(//span[{_has_class('author-born-location')}])[1]",
+    'author_description': f"(//div[{_has_class('author-description')}])[1]",
+}
+
+
+class LxmlParser:
+    """
+    Parser rápido: extrae los campos directamente con expresiones XPath precompiladas sobre el
+    árbol de lxml, sin construir un objeto BeautifulSoup. Con los selectores por defecto devuelve
+    exactamente los mismos datos que SoupParser.
+    """
+
+    def __init__(self, logger, selectors=None):
+        self.logger = logger
+        unknown = set(selectors or {}) - set(DEFAULT_SELECTORS)
+        if unknown:
+            raise ValueError(f"Selectores desconocidos: {', '.join(sorted(unknown))}")
+        expressions = {**DEFAULT_SELECTORS, **(selectors or {})}
+
+        self.quotes = etree.XPath(expressions['quotes'])
+        self.quote_text = etree.XPath(expressions['quote_text'])
+        self.quote_author = etree.XPath(expressions['quote_author'])
+        self.quote_link = etree.XPath(expressions['quote_link'])
+        self.quote_tags = etree.XPath(expressions['quote_tags'])
+
+        self.author_born_date = etree.XPath(expressions['author_born_date'])
+        self.author_born_location = etree.XPath(expressions['author_born_location'])
+        self.author_description = etree.XPath(expressions['author_description'])
+
+    @staticmethod
+    def _document(html):
+        if not html or not html.strip():
+            return None
+        return lxml.html.fromstring(html)
+
+    @staticmethod
+    def _first_text(nodes):
+        return nodes[0].text_content() if nodes else ''
+
+    def parse_quotes(self, html, base_url):
+        document = self._document(html)
+        if document is None:
+            return []
+        quotes = []
+
+        for frase in self.quotes(document):
+            try:
+                quotes.append({
+                    'frase_texto': self.quote_text(frase)[0].text_content(),
+                    'autor_nombre_completo': self.quote_author(frase)[0].text_content(),
+                    'autor_url': base_url + self.quote_link(frase)[0],
+                    'tags': [tag.text_content() for tag in self.quote_tags(frase)]
+                })
+            except Exception as e:
+                self.logger.error("Error al procesar una frase: %s", e)
+
+        return quotes
+
+    def parse_author(self, html):
+        document = self._document(html)
+        if document is None:
+            return {'author-born-date': '', 'author-born-location': '', 'author-description': ''}
+
+        return {
+            'author-born-date': self._first_text(self.author_born_date(document)),
+            'author-born-location': self._first_text(self.author_born_location(document)),
+            'author-description': self._first_text(self.author_description(document))
+        }
+
+
+# Backends disponibles, seleccionables con Scraper(..., parser='...')
+PARSERS = {
+    'bs4': SoupParser,
+    'lxml': LxmlParser
+}
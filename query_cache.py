@@ -0,0 +1,91 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class QueryCache:
+    """
+    Caché en memoria de resultados de consultas con expiración por TTL y desalojo LRU.
+
+    Además guarda la generación de los datos (la tabla data_version que incrementa
+    DatabaseUpdater en cada actualización): cuando cambia, se descarta todo el contenido.
+    Es segura para usar desde varios hilos, como ocurre con varias sesiones de Streamlit.
+    """
+
+    def __init__(self, max_entries=128, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.generation = None
+        self.lock = threading.Lock()
+        # Un lock por clave que se está calculando: solo un hilo ejecuta cada consulta a la vez
+        self.loading = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        """
+        Devuelve el valor guardado para la clave o lo calcula con `loader` y lo guarda.
+
+        Si varios hilos piden a la vez una clave que no está (por ejemplo, tras caducar el TTL o
+        cambiar la generación), solo uno ejecuta `loader` y los demás esperan y reciben su resultado.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self.lock:
+            key_lock = self.loading.setdefault(key, threading.Lock())
+        with key_lock:
+            # Otro hilo pudo cargar el valor mientras se esperaba el lock
+            value = self.get(key)
+            if value is not None:
+                return value
+            generation = self.generation
+            try:
+                value = loader()
+                # Si la generación cambió durante la carga, el resultado puede ser de los datos anteriores
+                if generation == self.generation:
+                    self.set(key, value)
+            finally:
+                with self.lock:
+                    self.loading.pop(key, None)
+        return value
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+
+    def check_generation(self, generation):
+        """Vacía la caché si la generación de los datos cambió desde la última comprobación."""
+        with self.lock:
+            if generation == self.generation:
+                return False
+            self.generation = generation
+            self.entries.clear()
+            return True
+
+    def __len__(self):
+        return len(self.entries)
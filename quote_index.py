@@ -0,0 +1,61 @@
+from collections import Counter
+from functools import reduce
+import numpy as np
+
+FILTER_MODES = ('and', 'or')
+
+
+class QuoteIndex:
+    """
+    Índice invertido en memoria sobre el conjunto de frases que carga la app.
+
+    Relaciona cada tag y cada autor_id con las posiciones de sus frases en el DataFrame,
+    guardadas como arrays ordenados de int32. Las selecciones, los filtros por varios tags
+    (AND / OR) y los tags que aparecen junto a otros se resuelven sin consultar la base de datos.
+    La app construye un índice por generación de datos (ver DataFetcher.get_quote_index).
+    """
+
+    def __init__(self, frases_df):
+        self.frases = frases_df.reset_index(drop=True)
+        self.empty = np.array([], dtype=np.int32)
+
+        tags = self.frases['tags'].explode().dropna()
+        self.tag_index = {tag: np.asarray(positions, dtype=np.int32)
+                          for tag, positions in tags.groupby(tags).groups.items()}
+        self.author_index = {int(autor_id): np.asarray(positions, dtype=np.int32)
+                             for autor_id, positions in self.frases.groupby('autor_id').indices.items()}
+
+    def quotes_with_tag(self, tag):
+        return self.tag_index.get(tag, self.empty)
+
+    def quotes_by_author(self, autor_id):
+        return self.author_index.get(int(autor_id), self.empty)
+
+    def filter_tags(self, tags, mode='and'):
+        """Devuelve las posiciones de las frases con todos los tags ('and') o con alguno ('or')."""
+        if mode not in FILTER_MODES:
+            raise ValueError(f"Modo de filtro desconocido: {mode}")
+        if not tags:
+            return self.empty
+        arrays = [self.quotes_with_tag(tag) for tag in tags]
+        if mode == 'and':
+            positions = reduce(lambda left, right: np.intersect1d(left, right, assume_unique=True), arrays)
+        else:
+            positions = np.unique(np.concatenate(arrays))
+        return positions.astype(np.int32, copy=False)
+
+    def co_occurring_tags(self, tags, limit=10):
+        """Tags que aparecen en las frases que tienen todos los `tags`, con su número de frases."""
+        counts = Counter()
+        for quote_tags in self.frases['tags'].iloc[self.filter_tags(tags, 'and')]:
+            counts.update(quote_tags)
+        for tag in tags:
+            counts.pop(tag, None)
+        return counts.most_common(limit)
+
+    def rows(self, positions):
+        """Filas del DataFrame de frases para las posiciones dadas."""
+        return self.frases.iloc[positions]
+
+    def __len__(self):
+        return len(self.frases)
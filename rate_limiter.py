@@ -0,0 +1,29 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+class HostRateLimiter:
+    """
+    Limitador de peticiones por host para el modo de scraping asíncrono.
+
+    Garantiza que entre dos peticiones al mismo host pasen al menos 1 / requests_per_second
+    segundos. Si requests_per_second es None no se aplica ningún límite.
+    """
+
+    def __init__(self, requests_per_second=None):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.locks = {}
+        self.last_request = {}
+
+    async def wait(self, url):
+        if not self.min_interval:
+            return
+        host = urlsplit(url).netloc
+        lock = self.locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            delay = self.last_request.get(host, 0.0) + self.min_interval - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.last_request[host] = time.monotonic()
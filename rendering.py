@@ -0,0 +1,44 @@
+QUOTE_STYLE = "background-color:#FFFACD;padding:10px;border-radius:10px;margin-bottom:10px;"
+AUTHOR_STYLE = "background-color:#E6E6FA;padding:10px;border-radius:10px;margin-bottom:10px;"
+
+
+def escape_column(column):
+    """Escapes a whole column for HTML (text and attribute values) with vectorized string operations."""
+    return (column.fillna('').astype(str)
+            .str.replace('&', '&amp;', regex=False)
+            .str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False)
+            .str.replace('"', '&quot;', regex=False)
+            .str.replace("'", '&#x27;', regex=False))
+
+
+def join_tags(tags):
+    """Joins each row's list of tags into one comma-separated string."""
+    return tags.map(lambda row_tags: ', '.join(row_tags) if isinstance(row_tags, (list, tuple)) else '')
+
+
+def quotes_html(frases_df):
+    """Builds the HTML for a whole page of quotes in one pass, ready for a single st.markdown call."""
+    if frases_df.empty:
+        return ''
+    blocks = (f'<div style="{QUOTE_STYLE}">'
+              + '<p><strong>Frase:</strong> ' + escape_column(frases_df['frase_texto']) + '</p>'
+              + '<p><strong>Autor:</strong> <a href="' + escape_column(frases_df['autor_url']) + '" target="_blank">'
+              + escape_column(frases_df['autor_nombre']) + ' ' + escape_column(frases_df['autor_apellido']) + '</a></p>'
+              + '<p><strong>Tags:</strong> ' + escape_column(join_tags(frases_df['tags'])) + '</p>'
+              + '</div>')
+    return '\n'.join(blocks)
+
+
+def authors_html(autores_df):
+    """Builds the HTML for a whole page of authors in one pass, ready for a single st.markdown call."""
+    if autores_df.empty:
+        return ''
+    blocks = (f'<div style="{AUTHOR_STYLE}">'
+              + '<p><strong>Nombre:</strong> ' + escape_column(autores_df['autor_nombre']) + ' '
+              + escape_column(autores_df['autor_apellido']) + '</p>'
+              + '<p><strong>Fecha de nacimiento:</strong> ' + escape_column(autores_df['autor_fecha_nac']) + '</p>'
+              + '<p><strong>Lugar de nacimiento:</strong> ' + escape_column(autores_df['autor_lugar_nac']) + '</p>'
+              + '<p><strong>Descripción:</strong> ' + escape_column(autores_df['autor_descripcion']) + '</p>'
+              + '</div>')
+    return '\n'.join(blocks)
@@ -1,18 +1,134 @@
 import asyncio
+from collections import Counter
 import asyncpg
+from contextlib import asynccontextmanager
 import pandas as pd
 from scraper import Scraper
-import db  # Importamos la configuración de la base de datos
+from data_normalizer import DataNormalizer, AUTOR_COLUMNS, FRASE_COLUMNS, FRASE_TAG_COLUMNS, TAG_COLUMNS
+from metrics import Metrics
+from snapshots import load_snapshot
+
+# Tablas temporales de la carga masiva; se eliminan al terminar la transacción principal. Cuando
+# cada lote es un savepoint de una misma transacción (save_stream con `conn`) las tablas siguen
+# existiendo tras el lote anterior: se reutilizan y se vacían antes de copiar el lote nuevo.
+STAGING_TABLES_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS tmp_tag (tag_id INTEGER, tag_texto VARCHAR(255)) ON COMMIT DROP;
+CREATE TEMP TABLE IF NOT EXISTS tmp_autor (
+    autor_nombre VARCHAR(255),
+    autor_apellido VARCHAR(255),
+    autor_url VARCHAR(255),
+    autor_fecha_nac VARCHAR(255),
+    autor_lugar_nac VARCHAR(255),
+    autor_descripcion TEXT
+) ON COMMIT DROP;
+CREATE TEMP TABLE IF NOT EXISTS tmp_frase (frase_texto TEXT, autor_nombre VARCHAR(255), autor_apellido VARCHAR(255)) ON COMMIT DROP;
+CREATE TEMP TABLE IF NOT EXISTS tmp_frase_tag (frase_texto TEXT, tag_id INTEGER) ON COMMIT DROP;
+TRUNCATE tmp_tag, tmp_autor, tmp_frase, tmp_frase_tag;
+"""
+
+# Volcado de las tablas temporales a las definitivas con sentencias por conjuntos.
+# DataNormalizer garantiza que cada entidad aparece una sola vez, así que ningún
+# INSERT ... ON CONFLICT intenta actualizar dos veces la misma fila.
+MERGE_STAGING_SQL = """
+INSERT INTO tag (tag_id, tag_texto)
+SELECT tag_id, tag_texto FROM tmp_tag
+ON CONFLICT (tag_id) DO UPDATE SET tag_texto = EXCLUDED.tag_texto;
+
+INSERT INTO autor (autor_nombre, autor_apellido, autor_url, autor_fecha_nac, autor_lugar_nac, autor_descripcion)
+SELECT autor_nombre, autor_apellido, autor_url, autor_fecha_nac, autor_lugar_nac, TRIM(autor_descripcion)
+FROM tmp_autor
+ON CONFLICT (autor_nombre, autor_apellido)
+DO UPDATE SET autor_url = EXCLUDED.autor_url,
+              autor_fecha_nac = EXCLUDED.autor_fecha_nac,
+              autor_lugar_nac = EXCLUDED.autor_lugar_nac,
+              autor_descripcion = EXCLUDED.autor_descripcion;
+
+INSERT INTO frase (frase_texto, autor_id)
+SELECT tmp_frase.frase_texto, autor.autor_id
+FROM tmp_frase
+JOIN autor ON autor.autor_nombre = tmp_frase.autor_nombre AND autor.autor_apellido = tmp_frase.autor_apellido
+ON CONFLICT (frase_texto) DO UPDATE SET autor_id = EXCLUDED.autor_id;
+
+INSERT INTO frase_tag (frase_id, tag_id)
+SELECT frase.frase_id, tmp_frase_tag.tag_id
+FROM tmp_frase_tag
+JOIN frase ON frase.frase_texto = tmp_frase_tag.frase_texto
+ON CONFLICT (frase_id, tag_id) DO NOTHING;
+"""
+
+# Sentencias del método 'prepared': se preparan una vez por conexión y se reutilizan
+PREPARED_SQL = {
+    'tag': """
+    INSERT INTO tag (tag_id, tag_texto)
+    VALUES ($1, $2)
+    ON CONFLICT (tag_id) DO UPDATE SET tag_texto = EXCLUDED.tag_texto
+    """,
+    'autor': """
+    INSERT INTO autor (autor_nombre, autor_apellido, autor_url, autor_fecha_nac, autor_lugar_nac, autor_descripcion)
+    VALUES ($1, $2, $3, $4, $5, TRIM($6))
+    ON CONFLICT (autor_nombre, autor_apellido)
+    DO UPDATE SET autor_url = EXCLUDED.autor_url,
+                  autor_fecha_nac = EXCLUDED.autor_fecha_nac,
+                  autor_lugar_nac = EXCLUDED.autor_lugar_nac,
+                  autor_descripcion = EXCLUDED.autor_descripcion
+    """,
+    # Todos los IDs de autor de un lote se resuelven con una sola consulta
+    'autor_ids': """
+    SELECT autor.autor_id, autor.autor_nombre, autor.autor_apellido
+    FROM autor
+    JOIN unnest($1::varchar[], $2::varchar[]) AS buscado(autor_nombre, autor_apellido)
+      ON autor.autor_nombre = buscado.autor_nombre AND autor.autor_apellido = buscado.autor_apellido
+    """,
+    'frase': """
+    INSERT INTO frase (frase_texto, autor_id)
+    SELECT * FROM unnest($1::text[], $2::integer[])
+    ON CONFLICT (frase_texto)
+    DO UPDATE SET autor_id = EXCLUDED.autor_id
+    RETURNING frase_id, frase_texto
+    """,
+    'frase_tag': """
+    INSERT INTO frase_tag (frase_id, tag_id)
+    VALUES ($1, $2)
+    ON CONFLICT (frase_id, tag_id) DO NOTHING
+    """
+}
+
+LOAD_METHODS = ('copy', 'prepared', 'rows')
+
+def chunks(records, size):
+    for start in range(0, len(records), size):
+        yield records[start:start + size]
 
 class AsyncDataSaver:
-    def __init__(self, db_name, db_user, db_password, db_host, db_port):
+    def __init__(self, db_name, db_user, db_password, db_host, db_port, method='copy', pool=None, chunk_size=500,
+                 metrics=None):
         self.db_name = db_name
         self.db_user = db_user
         self.db_password = db_password
         self.db_host = db_host
         self.db_port = db_port
+        # Pool compartido (db_pool.create_pool); si no se indica se abre una conexión propia
+        self.pool = pool
+        self.conn = None
+        # 'copy': carga masiva con COPY a tablas temporales; 'prepared': sentencias preparadas
+        # enviadas por lotes de chunk_size filas; 'rows': una sentencia por fila
+        if method not in LOAD_METHODS:
+            raise ValueError(f"Método de carga desconocido: {method}")
+        self.method = method
+        self.chunk_size = chunk_size
+        self.statements = {}
+        self.statements_conn = None
+        # Latencia de cada sentencia y filas escritas por tabla (ver metrics.py)
+        self.metrics = metrics if metrics is not None else Metrics()
+
+    def timed(self, statement):
+        """Mide la duración de una sentencia en el histograma saver_statement_seconds."""
+        return self.metrics.timer('saver_statement_seconds', method=self.method, statement=statement)
 
     async def connect(self):
+        if self.pool is not None:
+            self.conn = await self.pool.acquire()
+            return
         self.conn = await asyncpg.connect(
             database=self.db_name,
             user=self.db_user,
@@ -22,27 +138,232 @@ class AsyncDataSaver:
         )
 
     async def close(self):
-        await self.conn.close()
+        if self.pool is not None:
+            await self.pool.release(self.conn)
+        else:
+            await self.conn.close()
+        self.conn = None
+
+    @asynccontextmanager
+    async def using_connection(self, conn=None):
+        """
+        Usa la conexión que indique el llamador (por ejemplo, una con una transacción ya abierta)
+        o toma una propia, del pool si existe, y la libera al terminar.
+        """
+        if conn is not None:
+            self.conn = conn
+            try:
+                yield conn
+            finally:
+                self.conn = None
+            return
 
-    async def save_to_database(self, frases_df, tags_df):
         await self.connect()
+        try:
+            yield self.conn
+        finally:
+            await self.close()
 
-        async with self.conn.transaction():
-            try:
-                # Insertar datos en la tabla de etiquetas (tags)
-                for _, row in tags_df.iterrows():
-                    try:
+    @staticmethod
+    def rows_to_dataframes(rows):
+        """
+        Convierte un lote de filas del scraper en los DataFrames de frases y tags que espera
+        write_dataframes. Los tags se obtienen de las propias filas (Tags / Tags_IDs).
+        """
+        frases_df = pd.DataFrame(rows)
+        tags = {}
+        for row in rows:
+            tags.update(zip(row['Tags'], row['Tags_IDs']))
+        tags_df = pd.DataFrame(list(tags.items()), columns=['tag_texto', 'tag_id'])
+        return frases_df, tags_df
+
+    async def save_to_database(self, frases_df, tags_df, conn=None):
+        """
+        Guarda los DataFrames en una transacción. Si se pasa `conn` con una transacción abierta,
+        la escritura forma parte de ella (como savepoint). Devuelve True si se confirmó.
+        """
+        async with self.using_connection(conn):
+            return await self.write_batch(frases_df, tags_df)
+
+    async def write_batch(self, frases_df, tags_df):
+        """
+        Escribe un lote en su propia transacción (un savepoint si ya hay una abierta). Si la
+        escritura falla, la excepción sale de la transacción para que PostgreSQL la deshaga
+        (tras un error no se puede liberar el savepoint) y se informa con print. Las filas se
+        cuentan en saver_rows_total solo cuando el lote se confirmó. Devuelve True si se confirmó.
+        """
+        try:
+            async with self.conn.transaction():
+                written = await self.write_dataframes(frases_df, tags_df)
+        except asyncpg.PostgresError as e:
+            print(f"Error de PostgreSQL: {e}")
+            return False
+        except Exception as e:
+            print(f"Error inesperado: {e}")
+            return False
+
+        for table, count in written.items():
+            self.metrics.inc('saver_rows_total', count, table=table)
+        return True
+
+    async def save_snapshot(self, snapshot_dir='snapshots', run_id=None, conn=None):
+        """
+        Carga en la base de datos una instantánea columnar (por defecto la más reciente) guardada
+        con Scraper.save_snapshot, sin volver a hacer scraping. Devuelve el número de frases.
+        """
+        frases_df, tags_df = load_snapshot(snapshot_dir, run_id)
+        if not await self.save_to_database(frases_df, tags_df, conn=conn):
+            return 0
+        return len(frases_df)
+
+    async def save_stream(self, batches, conn=None):
+        """
+        Consume un iterador asíncrono de lotes de filas (por ejemplo Scraper.aiter_quotes) y escribe
+        cada lote en su propia transacción a medida que llega, de modo que las escrituras se solapan
+        con el scraping y nunca se tiene el sitio completo en memoria. Si se pasa `conn` con una
+        transacción abierta, cada lote es un savepoint dentro de ella: un lote fallido se deshace
+        sin afectar a los demás. Devuelve el número de frases de los lotes confirmados.
+        """
+        total = 0
+
+        async with self.using_connection(conn):
+            async for rows in batches:
+                frases_df, tags_df = self.rows_to_dataframes(rows)
+                if await self.write_batch(frases_df, tags_df):
+                    total += len(rows)
+
+        return total
+
+    async def write_dataframes(self, frases_df, tags_df):
+        """
+        Escribe tags, autores, frases y relaciones frase_tag usando la conexión abierta,
+        con el método de carga configurado. Debe llamarse dentro de una transacción; los errores
+        de la base de datos se propagan para que se deshaga. Devuelve las filas escritas por tabla.
+        """
+        # Cada entidad se escribe una sola vez aunque aparezca en varias filas
+        with self.metrics.timer('saver_normalize_seconds'):
+            data = DataNormalizer.normalize(frases_df, tags_df)
+
+        with self.metrics.timer('saver_batch_seconds', method=self.method):
+            if self.method == 'copy':
+                written = await self.write_normalized_copy(data)
+            elif self.method == 'prepared':
+                written = await self.write_normalized_prepared(data)
+            else:
+                written = await self.write_normalized_rows(data)
+        return written
+
+    async def write_normalized_copy(self, data):
+        """
+        Carga masiva: copia los datos normalizados a tablas temporales con COPY y los vuelca a las
+        tablas definitivas con un INSERT ... SELECT ... ON CONFLICT por tabla. El número de viajes
+        a la base de datos depende del número de tablas, no del número de filas. Devuelve las filas
+        escritas por tabla.
+        """
+        if data.frases.empty and data.tags.empty:
+            return {}
+
+        with self.timed('staging_tables'):
+            await self.conn.execute(STAGING_TABLES_SQL)
+        with self.timed('copy_tag'):
+            await self.conn.copy_records_to_table(
+                'tmp_tag', records=data.tags[TAG_COLUMNS].itertuples(index=False, name=None),
+                columns=TAG_COLUMNS)
+        with self.timed('copy_autor'):
+            await self.conn.copy_records_to_table(
+                'tmp_autor', records=data.autores[AUTOR_COLUMNS].itertuples(index=False, name=None),
+                columns=AUTOR_COLUMNS)
+        with self.timed('copy_frase'):
+            await self.conn.copy_records_to_table(
+                'tmp_frase', records=data.frases[FRASE_COLUMNS].itertuples(index=False, name=None),
+                columns=FRASE_COLUMNS)
+        with self.timed('copy_frase_tag'):
+            await self.conn.copy_records_to_table(
+                'tmp_frase_tag', records=data.frase_tags[FRASE_TAG_COLUMNS].itertuples(index=False, name=None),
+                columns=FRASE_TAG_COLUMNS)
+        with self.timed('merge'):
+            await self.conn.execute(MERGE_STAGING_SQL)
+        return {'autor': len(data.autores), 'tag': len(data.tags), 'frase': len(data.frases),
+                'frase_tag': len(data.frase_tags)}
+
+    async def prepare_statements(self):
+        """Prepara las sentencias del método 'prepared' una sola vez por conexión."""
+        if self.statements_conn is not self.conn:
+            self.statements = {name: await self.conn.prepare(sql) for name, sql in PREPARED_SQL.items()}
+            self.statements_conn = self.conn
+        return self.statements
+
+    async def write_normalized_prepared(self, data):
+        """
+        Escribe los datos normalizados con sentencias preparadas, enviando las filas en bloques de
+        chunk_size con executemany. Los IDs de autor se obtienen con una única consulta y las
+        frases se insertan por bloques devolviendo sus IDs. Devuelve las filas escritas por tabla.
+        """
+        statements = await self.prepare_statements()
+
+        tag_records = list(data.tags[TAG_COLUMNS].itertuples(index=False, name=None))
+        for chunk in chunks(tag_records, self.chunk_size):
+            with self.timed('tag'):
+                await statements['tag'].executemany(chunk)
+
+        autor_records = list(data.autores[AUTOR_COLUMNS].itertuples(index=False, name=None))
+        for chunk in chunks(autor_records, self.chunk_size):
+            with self.timed('autor'):
+                await statements['autor'].executemany(chunk)
+
+        autor_ids = {}
+        if not data.autores.empty:
+            with self.timed('autor_ids'):
+                autor_id_records = await statements['autor_ids'].fetch(list(data.autores['autor_nombre']),
+                                                                       list(data.autores['autor_apellido']))
+            for record in autor_id_records:
+                autor_ids[(record['autor_nombre'], record['autor_apellido'])] = record['autor_id']
+
+        frase_records = [(frase_texto, autor_ids[(autor_nombre, autor_apellido)])
+                         for frase_texto, autor_nombre, autor_apellido
+                         in data.frases[FRASE_COLUMNS].itertuples(index=False, name=None)
+                         if (autor_nombre, autor_apellido) in autor_ids]
+        frase_ids = {}
+        for chunk in chunks(frase_records, self.chunk_size):
+            textos, ids = zip(*chunk)
+            with self.timed('frase'):
+                frase_records_ids = await statements['frase'].fetch(list(textos), list(ids))
+            for record in frase_records_ids:
+                frase_ids[record['frase_texto']] = record['frase_id']
+
+        frase_tag_records = [(frase_ids[frase_texto], tag_id)
+                             for frase_texto, tag_id in data.frase_tags[FRASE_TAG_COLUMNS].itertuples(index=False, name=None)
+                             if frase_texto in frase_ids]
+        for chunk in chunks(frase_tag_records, self.chunk_size):
+            with self.timed('frase_tag'):
+                await statements['frase_tag'].executemany(chunk)
+        return {'autor': len(autor_records), 'tag': len(tag_records), 'frase': len(frase_ids),
+                'frase_tag': len(frase_tag_records)}
+
+    async def write_normalized_rows(self, data):
+        """
+        Escribe los datos normalizados fila a fila, con una sentencia por tag, autor, frase y relación.
+        Devuelve las filas escritas por tabla.
+        """
+        written = Counter()
+        try:
+            # Insertar datos en la tabla de etiquetas (tags)
+            for tag_id, tag_texto in data.tags[TAG_COLUMNS].itertuples(index=False, name=None):
+                try:
+                    with self.timed('tag'):
                         await self.conn.execute("""
                         INSERT INTO tag (tag_id, tag_texto)
                         VALUES ($1, $2)
                         ON CONFLICT (tag_id) DO UPDATE SET tag_texto = EXCLUDED.tag_texto
-                        """, row.get('tag_id'), row.get('tag_texto'))
-                    except Exception as e:
-                        print(f"Error al insertar en tag: {e}")
+                        """, int(tag_id), tag_texto)
+                    written['tag'] += 1
+                except Exception as e:
+                    print(f"Error al insertar en tag: {e}")
 
-                # Insertar datos en la tabla de autores
-                for _, row in frases_df.iterrows():
-                    try:
+            # Insertar datos en la tabla de autores (una vez por autor)
+            for autor in data.autores[AUTOR_COLUMNS].itertuples(index=False, name=None):
+                try:
+                    with self.timed('autor'):
                         await self.conn.execute("""
                         INSERT INTO autor (autor_nombre, autor_apellido, autor_url, autor_fecha_nac, autor_lugar_nac, autor_descripcion)
                         VALUES ($1, $2, $3, $4, $5, TRIM($6))
@@ -51,53 +372,59 @@ class AsyncDataSaver:
                                       autor_fecha_nac = EXCLUDED.autor_fecha_nac,
                                       autor_lugar_nac = EXCLUDED.autor_lugar_nac,
                                       autor_descripcion = EXCLUDED.autor_descripcion
-                        """, row.get('autor_nombre'), row.get('autor_apellido'),
-                           row.get('autor_url'), row.get('autor_fecha_nac'),
-                           row.get('autor_lugar_nac'), row.get('autor_descripcion'))
-                    except Exception as e:
-                        print(f"Error al insertar en autor: {e}")
-
-                # Insertar datos en la tabla de frases (quotes)
-                for _, row in frases_df.iterrows():
-                    try:
-                        # Obtener el id del autor
+                        """, *autor)
+                    written['autor'] += 1
+                except Exception as e:
+                    print(f"Error al insertar en autor: {e}")
+
+            # Insertar datos en la tabla de frases (quotes)
+            frase_ids = {}
+            for frase_texto, autor_nombre, autor_apellido in data.frases[FRASE_COLUMNS].itertuples(index=False, name=None):
+                try:
+                    # Obtener el id del autor
+                    with self.timed('autor_id'):
                         autor_id = await self.conn.fetchval("""
                         SELECT autor_id FROM autor WHERE autor_nombre = $1 AND autor_apellido = $2
-                        """, row.get('autor_nombre'), row.get('autor_apellido'))
+                        """, autor_nombre, autor_apellido)
 
-                        if autor_id:
-                            frase_id = await self.conn.fetchval("""
+                    if autor_id:
+                        with self.timed('frase'):
+                            frase_ids[frase_texto] = await self.conn.fetchval("""
                             INSERT INTO frase (frase_texto, autor_id)
                             VALUES ($1, $2)
                             ON CONFLICT (frase_texto)
                             DO UPDATE SET autor_id = EXCLUDED.autor_id
                             RETURNING frase_id
-                            """, row.get('frase_texto'), autor_id)
-                    except Exception as e:
-                        print(f"Error al insertar o actualizar en frase: {e}")
-                        continue
-
-                    # Insertar relaciones en la tabla de unión frase_tag
-                    tags_ids = row.get('Tags_IDs', [])  # 'Tags_IDs' es ahora una lista de IDs
-                    for tag_id in tags_ids:
-                        try:
-                            tag_id = int(tag_id)  # Convertir a entero si es necesario
-                            await self.conn.execute("""
-                            INSERT INTO frase_tag (frase_id, tag_id)
-                            VALUES ($1, $2)
-                            ON CONFLICT (frase_id, tag_id) DO NOTHING
-                            """, frase_id, tag_id)
-                        except Exception as e:
-                            print(f"Error al insertar en frase_tag: {e}")
+                            """, frase_texto, autor_id)
+                        written['frase'] += 1
+                except Exception as e:
+                    print(f"Error al insertar o actualizar en frase: {e}")
 
-            except asyncpg.PostgresError as e:
-                print(f"Error de PostgreSQL: {e}")
-            except Exception as e:
-                print(f"Error inesperado: {e}")
+            # Insertar relaciones en la tabla de unión frase_tag
+            for frase_texto, tag_id in data.frase_tags[FRASE_TAG_COLUMNS].itertuples(index=False, name=None):
+                frase_id = frase_ids.get(frase_texto)
+                if frase_id is None:
+                    continue
+                try:
+                    with self.timed('frase_tag'):
+                        await self.conn.execute("""
+                        INSERT INTO frase_tag (frase_id, tag_id)
+                        VALUES ($1, $2)
+                        ON CONFLICT (frase_id, tag_id) DO NOTHING
+                        """, frase_id, int(tag_id))
+                    written['frase_tag'] += 1
+                except Exception as e:
+                    print(f"Error al insertar en frase_tag: {e}")
 
-        await self.close()
+        except asyncpg.PostgresError as e:
+            print(f"Error de PostgreSQL: {e}")
+        except Exception as e:
+            print(f"Error inesperado: {e}")
+        return written
 
 if __name__ == "__main__":
+    import db  # Configuración de la base de datos (solo necesaria al ejecutar el script)
+
     base_url = "https://quotes.toscrape.com/"
     scraper = Scraper(base_url)
     frases_df, tags_df = scraper.scrape_quotes()
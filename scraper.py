@@ -1,155 +1,598 @@
+import asyncio
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
-from bs4 import BeautifulSoup
-import logging
-import os
+import time
+from author_cache import AuthorCache
+from rate_limiter import HostRateLimiter
+from http_cache import ConditionalCache
+from html_archive import MissingResponse
+from parsers import PARSERS
+from metrics import Metrics
+from log_config import setup_logging
+from snapshots import write_snapshot
+
+# Códigos de estado que se consideran transitorios y se reintentan
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Columnas del DataFrame de frases que devuelve el scraper
+FRASES_COLUMNS = ['frase_texto', 'autor_nombre', 'autor_apellido', 'autor_url', 'autor_fecha_nac',
+                  'autor_lugar_nac', 'autor_descripcion', 'Tags', 'Tags_IDs']
 
 class Scraper:
-    def __init__(self, base_url):
+    def __init__(self, base_url, author_cache=None, http_cache=None, crawl_state=None, parser='bs4',
+                 pool_size=10, timeout=30.0, max_retries=3, backoff_factor=0.5, selectors=None,
+                 page_path='page/{}/', metrics=None, archive=None, replay=None):
         self.base_url = base_url
+        # Ruta de cada página del listado respecto a base_url ({} es el número de página)
+        self.page_path = page_path
         self.tags_dict = {}
         self.next_tag_id = 1
+        # Estado del modo incremental: si se indica, solo se emiten las frases nuevas o modificadas
+        self.crawl_state = crawl_state
+        if crawl_state is not None:
+            # Los IDs de los tags se conservan entre ejecuciones para que los deltas sean coherentes
+            self.tags_dict = dict(crawl_state.tags)
+            self.next_tag_id = crawl_state.next_tag_id
+        # Caché de detalles de autor: evita descargar la misma página de autor una vez por frase
+        self.author_cache = author_cache if author_cache is not None else AuthorCache()
+        # Autores cuya página ya se revalidó en esta ejecución (solo en modo incremental)
+        self.revalidated_authors = set()
+        # Validadores ETag/Last-Modified por URL para hacer peticiones condicionales
+        self.http_cache = http_cache if http_cache is not None else ConditionalCache()
+        # Métricas de red y de procesamiento del HTML (ver metrics.py)
+        self.metrics = metrics if metrics is not None else Metrics()
+        # Archivo de respuestas (ver html_archive.py): con `archive` se guarda cada respuesta
+        # descargada; con `replay` las páginas se leen del archivo en lugar de pedirlas por HTTP
+        self.archive = archive
+        self.replay = replay
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
         self.setup_logger()
+        # Backend de extracción del HTML: 'bs4' (BeautifulSoup) o 'lxml' (XPath precompilado).
+        # `selectors` sustituye expresiones XPath de LxmlParser para sitios con otra estructura.
+        if parser not in PARSERS:
+            raise ValueError(f"Parser desconocido: {parser}. Opciones: {', '.join(PARSERS)}")
+        self.parser = PARSERS[parser](self.logger, selectors=selectors)
+        self.setup_session(pool_size)
+
+    def setup_session(self, pool_size):
+        """
+        Crea la sesión HTTP compartida: mantiene las conexiones abiertas (keep-alive) en un pool
+        y reintenta los errores transitorios con backoff exponencial.
+        """
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET'])
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        self.session.close()
 
     def setup_logger(self):
-        # Asegurarse de que la carpeta 'logs' exista
-        log_dir = 'logs'
-        os.makedirs(log_dir, exist_ok=True)
+        # Los manejadores se instalan una sola vez por proceso (ver log_config.py), por muchos
+        # Scraper que se creen; la escritura en logs/scraper.log se hace desde otro hilo
+        self.logger = setup_logging('scraper')
+
+    def page_url(self, page_number):
+        return self.base_url + self.page_path.format(page_number)
+
+    def request_kind(self, parse):
+        """Tipo de URL para las métricas: 'author' para las páginas de autor, 'listing' para el listado."""
+        return 'author' if parse == self.parse_author_page else 'listing'
+
+    def record_response(self, kind, response, elapsed):
+        self.metrics.observe('scraper_http_request_seconds', elapsed, kind=kind)
+        self.metrics.inc('scraper_http_requests_total', kind=kind, status=response.status_code)
+        self.metrics.inc('scraper_http_bytes_total', len(response.content), kind=kind)
 
-        # Crear el logger
-        self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.INFO)
+    def parse_response(self, kind, parse, html):
+        with self.metrics.timer('scraper_parse_seconds', kind=kind):
+            return parse(html)
 
-        # Crear manejador de archivo con la ruta dentro de la carpeta 'logs'
-        log_file = os.path.join(log_dir, 'scraper.log')
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(logging.INFO)
+    def conditional_headers(self, url):
+        # Mientras se archiva, una URL que aún no está en el archivo se pide completa: un 304
+        # reutilizaría el resultado de ConditionalCache sin dejar cuerpo que archivar
+        if self.archive is not None and url not in self.archive:
+            return {}
+        return self.http_cache.conditional_headers(url)
 
-        # Crear el formato de los logs
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
+    def archive_response(self, url, response):
+        if self.archive is not None:
+            self.archive.append(url, response.status_code, response.headers, response.text)
 
-        # Agregar manejador de archivo al logger
-        self.logger.addHandler(file_handler)
+    def replay_page(self, kind, url, parse):
+        """
+        Procesa la respuesta archivada de la URL. Una respuesta de error archivada lanza
+        requests.exceptions.HTTPError, como la petición original; si la URL no está en el archivo
+        lanza MissingResponse, que detiene el reprocesado en lugar de darlo por terminado.
+        """
+        archived = self.replay.get(url)
+        if archived is None:
+            raise MissingResponse(f"URL no archivada: {url}")
+        self.metrics.inc('scraper_replay_responses_total', kind=kind)
+        if archived.status >= 400:
+            raise requests.exceptions.HTTPError(f"{archived.status} (respuesta archivada) para la URL: {url}")
+        return self.parse_response(kind, parse, archived.text)
+
+    def parse_author_page(self, html):
+        """
+        Extrae los detalles del autor a partir del HTML de su página.
+        """
+        return self.parser.parse_author(html)
+
+    def parse_quotes_page(self, html):
+        """
+        Extrae las frases de una página del listado. Devuelve una lista de diccionarios con el texto,
+        el nombre completo del autor, la URL de su página y los tags de cada frase.
+        """
+        return self.parser.parse_quotes(html, self.base_url)
+
+    def build_row(self, quote, details):
+        """
+        Construye la fila final de una frase a partir de sus datos y los detalles de su autor,
+        asignando los IDs de los tags.
+        """
+        nombres = quote['autor_nombre_completo'].split()
+        nombre = nombres[0]
+        apellido = " ".join(nombres[1:]) if len(nombres) > 1 else ""
+
+        tags_ids = []
+
+        for tag in quote['tags']:
+            if tag not in self.tags_dict:
+                self.tags_dict[tag] = self.next_tag_id
+                self.next_tag_id += 1
+            tags_ids.append(self.tags_dict[tag])
+        self.logger.debug("IDs de los tags: %s", tags_ids)
+
+        return {
+            'frase_texto': quote['frase_texto'],
+            'autor_nombre': nombre,
+            'autor_apellido': apellido,
+            'autor_url': quote['autor_url'],
+            'autor_fecha_nac': details['author-born-date'],
+            'autor_lugar_nac': details['author-born-location'],
+            'autor_descripcion': details['author-description'],
+            'Tags': quote['tags'],
+            'Tags_IDs': tags_ids
+        }
+
+    def fetch_page(self, url, parse):
+        """
+        Descarga una URL con la sesión compartida y la procesa con la función `parse`.
+
+        Si se conocen validadores de la URL se envía una petición condicional; ante un 304 se
+        devuelve el resultado guardado sin volver a procesar la página. Lanza
+        requests.exceptions.RequestException si la petición falla. En modo replay la página se
+        lee del archivo de respuestas y lanza MissingResponse si no está archivada.
+        """
+        kind = self.request_kind(parse)
+        if self.replay is not None:
+            return self.replay_page(kind, url, parse)
+        start = time.perf_counter()
+        response = self.session.get(url, headers=self.conditional_headers(url), timeout=self.timeout)
+        self.record_response(kind, response, time.perf_counter() - start)
+        if response.status_code == 304:
+            parsed = self.http_cache.get_parsed(url)
+            if parsed is not None:
+                self.http_cache.not_modified += 1
+                self.logger.debug("Página sin cambios (304): %s", url)
+                return parsed
+            start = time.perf_counter()
+            response = self.session.get(url, timeout=self.timeout)
+            self.record_response(kind, response, time.perf_counter() - start)
+        self.archive_response(url, response)
+        response.raise_for_status()
+
+        parsed = self.parse_response(kind, parse, response.text)
+        self.http_cache.store(url, response.headers, parsed)
+        return parsed
+
+    def page_needs_processing(self, page_url, quotes):
+        """
+        En modo incremental indica si la página cambió desde la ejecución anterior;
+        sin estado de scraping todas las páginas se procesan.
+        """
+        if self.crawl_state is None or self.crawl_state.page_changed(page_url, quotes):
+            return True
+        self.logger.info("Página sin cambios, se omite: %s", page_url)
+        return False
+
+    def build_page_rows(self, page_url, quotes, get_details):
+        """
+        Construye las filas de las frases de una página usando `get_details` para obtener los
+        detalles de cada autor. En modo incremental solo se emiten las frases nuevas o cuyo autor
+        cambió, y la huella de la página solo se registra si todas sus frases se procesaron.
+        """
+        rows = []
+        complete = True
+
+        for quote in quotes:
+            try:
+                self.logger.debug("Frase obtenida: %s", quote['frase_texto'])
+                details = get_details(quote['autor_url'])
+
+                if details is None:
+                    self.logger.warning("No se pudieron obtener detalles del autor para la frase: %s", quote['frase_texto'])
+                    complete = False
+                    continue
+
+                if self.crawl_state is not None:
+                    self.crawl_state.mark_author_quote(quote)
+                    author_changed = self.crawl_state.author_changed(quote['autor_url'], details)
+                    if not author_changed and not self.crawl_state.quote_is_new(quote):
+                        continue
+
+                self.logger.debug("Tags obtenidos: %s", quote['tags'])
+                rows.append(self.build_row(quote, details))
+                if self.crawl_state is not None:
+                    self.crawl_state.mark_quote(quote)
+            except MissingResponse:
+                raise
+            except Exception as e:
+                self.logger.error("Error al procesar una frase: %s", e)
+                complete = False
+                continue
+
+        if self.crawl_state is not None and complete:
+            self.crawl_state.mark_page(page_url, quotes)
+        return rows
+
+    def build_author_rows(self, autor_urls, get_details):
+        """
+        Modo incremental: comprueba los autores de las páginas omitidas y, para cada autor cuyos
+        detalles cambiaron, emite una de sus frases con los detalles nuevos.
+        """
+        rows = []
+        for autor_url in autor_urls:
+            try:
+                details = get_details(autor_url)
+                if details is None or not self.crawl_state.author_changed(autor_url, details):
+                    continue
+                self.logger.info("Detalles del autor modificados: %s", autor_url)
+                rows.append(self.build_row(self.crawl_state.author_quotes[autor_url], details))
+            except MissingResponse:
+                raise
+            except Exception as e:
+                self.logger.error("Error al revisar el autor %s: %s", autor_url, e)
+        return rows
+
+    def cached_author_details(self, autor_url):
+        """
+        Detalles del autor guardados en la caché. En modo incremental, si el servidor dio
+        validadores (ETag/Last-Modified) para la página del autor, la primera consulta de cada
+        autor en la ejecución no usa la caché: la página se revalida con una petición condicional,
+        que solo devuelve el cuerpo si cambió. Sin validadores se usa la caché hasta que caduca.
+        """
+        if (self.crawl_state is not None and autor_url not in self.revalidated_authors
+                and autor_url in self.http_cache):
+            self.revalidated_authors.add(autor_url)
+            return None
+        return self.author_cache.get(autor_url)
 
     def get_author_details(self, autor_url):
         """
         Extrae la fecha de nacimiento, ubicación de nacimiento y descripción del autor desde su página.
+        Los resultados se guardan en la caché de autores, por lo que cada página se descarga una sola vez.
         """
-        self.logger.info(f"Extrayendo detalles del autor desde: {autor_url}")
+        cached_details = self.cached_author_details(autor_url)
+        if cached_details is not None:
+            return cached_details
+
+        self.logger.debug("Extrayendo detalles del autor desde: %s", autor_url)
         try:
-            autor_response = requests.get(autor_url)
-            autor_response.raise_for_status()
+            details = self.fetch_page(autor_url, self.parse_author_page)
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Error al obtener la página del autor: {e}")
+            self.logger.error("Error al obtener la página del autor: %s", e)
             return None
-        
-        try:
-            autor_soup = BeautifulSoup(autor_response.text, 'lxml')
-            
-            born_date = autor_soup.find('span', class_='author-born-date')
-            born_location = autor_soup.find('span', class_='author-born-location')
-            description = autor_soup.find('div', class_='author-description')
-            
-            details = {
-                'author-born-date': born_date.get_text() if born_date else '',
-                'author-born-location': born_location.get_text() if born_location else '',
-                'author-description': description.get_text() if description else ''
-            }
-            self.logger.info(f"Detalles del autor obtenidos: {details}")
+        except MissingResponse:
+            raise
         except Exception as e:
-            self.logger.error(f"Error al procesar la página del autor: {e}")
-            details = None
-        
+            self.logger.error("Error al procesar la página del autor: %s", e)
+            return None
+
+        self.logger.debug("Detalles del autor obtenidos: %s", details)
+        self.author_cache.set(autor_url, details)
         return details
 
-    def scrape_quotes(self):
+    def iter_quotes(self):
         """
-        Realiza el scraping de frases, autores y etiquetas desde la página especificada.
+        Generador que realiza el scraping página a página y produce, por cada página del listado,
+        la lista de filas de sus frases. Permite procesar los datos a medida que llegan sin
+        acumular todo el sitio en memoria.
         """
         self.logger.info("Iniciando scraping de frases")
-        data = []
         page_number = 1
 
         while True:
-            page_url = f"{self.base_url}page/{page_number}/"
-            self.logger.info(f"Scraping página: {page_url}")
+            page_url = self.page_url(page_number)
+            self.logger.info("Scraping página: %s", page_url)
 
             try:
-                frases_to_scrape = requests.get(page_url)
-                frases_to_scrape.raise_for_status()
+                quotes = self.fetch_page(page_url, self.parse_quotes_page)
             except requests.exceptions.RequestException as e:
-                self.logger.error(f"Error al realizar la petición: {e}")
+                self.logger.error("Error al realizar la petición: %s", e)
+                break
+            except MissingResponse:
+                raise
+            except Exception as e:
+                self.logger.error("Error al procesar la página de frases: %s", e)
                 break
 
             try:
-                soup = BeautifulSoup(frases_to_scrape.text, 'lxml')
-                frases_html = soup.find_all('div', attrs={'class': 'quote'})
-
-                if not frases_html:
+                if not quotes:
                     self.logger.info("No se encontraron más frases.")
                     break
 
-                for frase in frases_html:
-                    try:
-                        contenido_frase = frase.find('span', class_='text').get_text()
-                        self.logger.info(f"Frase obtenida: {contenido_frase}")
-                        
-                        autor_nombre_completo = frase.find('small', class_='author').get_text()
-                        autor_url = frase.find('a')['href']
-                        autor_url = self.base_url + autor_url
-                        
-                        details = self.get_author_details(autor_url)
-                        
-                        if details is None:
-                            self.logger.warning(f"No se pudieron obtener detalles del autor para la frase: {contenido_frase}")
-                            continue
-                        
-                        nombres = autor_nombre_completo.split()
-                        nombre = nombres[0]
-                        apellido = " ".join(nombres[1:]) if len(nombres) > 1 else ""
-
-                        tags = [tag.get_text() for tag in frase.find_all('a', class_='tag')]
-                        self.logger.info(f"Tags obtenidos: {tags}")
-                        
-                        tags_ids = []
-                        
-                        for tag in tags:
-                            if tag not in self.tags_dict:
-                                self.tags_dict[tag] = self.next_tag_id
-                                self.next_tag_id += 1
-                            tags_ids.append(self.tags_dict[tag])
-                        self.logger.info(f"IDs de los tags: {tags_ids}")
-                        
-                        temp_row = {
-                            'frase_texto': contenido_frase,
-                            'autor_nombre': nombre,
-                            'autor_apellido': apellido,
-                            'autor_url': autor_url,
-                            'autor_fecha_nac': details['author-born-date'],
-                            'autor_lugar_nac': details['author-born-location'],
-                            'autor_descripcion': details['author-description'],
-                            'Tags': tags,
-                            'Tags_IDs': tags_ids
-                        }
-                        data.append(temp_row)
-                    except Exception as e:
-                        self.logger.error(f"Error al procesar una frase: {e}")
-                        continue
+                rows = []
+                if self.page_needs_processing(page_url, quotes):
+                    rows = self.build_page_rows(page_url, quotes, self.get_author_details)
 
                 page_number += 1
+            except MissingResponse:
+                raise
             except Exception as e:
-                self.logger.error(f"Error al procesar la página de frases: {e}")
+                self.logger.error("Error al procesar la página de frases: %s", e)
                 break
-        
+
+            if rows:
+                yield rows
+
+        if self.crawl_state is not None:
+            rows = self.build_author_rows(self.crawl_state.unchecked_authors(), self.get_author_details)
+            if rows:
+                yield rows
+
+        self.finish_crawl()
+
+    def scrape_quotes(self):
+        """
+        Realiza el scraping de frases, autores y etiquetas desde la página especificada.
+        """
+        data = [row for rows in self.iter_quotes() for row in rows]
+        frases_df, tags_df = self.rows_to_dataframes(data, all_tags=self.crawl_state is None)
+        self.logger.info("Scraping completado. Total de frases: %d. Total de tags: %d.", len(frases_df), len(tags_df))
+        return frases_df, tags_df
+
+    async def fetch_async(self, client, url, semaphore, rate_limiter, parse):
+        """
+        Versión asíncrona de fetch_page: descarga la URL con el cliente HTTP compartido respetando
+        el límite de concurrencia y el de peticiones por host, reintenta los errores transitorios
+        y procesa la respuesta con `parse`. Devuelve el resultado o None si la petición falla.
+        En modo replay lanza MissingResponse si la URL no está archivada.
+        """
+        kind = self.request_kind(parse)
+        if self.replay is not None:
+            try:
+                return self.replay_page(kind, url, parse)
+            except MissingResponse:
+                raise
+            except Exception as e:
+                self.logger.error("Error al procesar la página archivada %s: %s", url, e)
+                return None
+
+        async with semaphore:
+            headers = self.conditional_headers(url)
+            for attempt in range(self.max_retries + 1):
+                await rate_limiter.wait(url)
+                try:
+                    start = time.perf_counter()
+                    response = await client.get(url, headers=headers)
+                    self.record_response(kind, response, time.perf_counter() - start)
+                    if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                        break
+                except httpx.TransportError as e:
+                    if attempt == self.max_retries:
+                        self.logger.error("Error al realizar la petición a %s: %s", url, e)
+                        return None
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+
+            if response.status_code == 304:
+                parsed = self.http_cache.get_parsed(url)
+                if parsed is not None:
+                    self.http_cache.not_modified += 1
+                    self.logger.debug("Página sin cambios (304): %s", url)
+                    return parsed
+                start = time.perf_counter()
+                response = await client.get(url)
+                self.record_response(kind, response, time.perf_counter() - start)
+
+            self.archive_response(url, response)
+            try:
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                self.logger.error("Error al realizar la petición a %s: %s", url, e)
+                return None
+
+        try:
+            parsed = self.parse_response(kind, parse, response.text)
+        except Exception as e:
+            self.logger.error("Error al procesar la página %s: %s", url, e)
+            return None
+        self.http_cache.store(url, response.headers, parsed)
+        return parsed
+
+    async def get_author_details_async(self, autor_url, fetch):
+        """
+        Versión asíncrona de get_author_details que comparte la caché de autores.
+        """
+        cached_details = self.cached_author_details(autor_url)
+        if cached_details is not None:
+            return cached_details
+
+        self.logger.debug("Extrayendo detalles del autor desde: %s", autor_url)
+        details = await fetch(autor_url, self.parse_author_page)
+        if details is None:
+            return None
+
+        self.logger.debug("Detalles del autor obtenidos: %s", details)
+        self.author_cache.set(autor_url, details)
+        return details
+
+    async def scrape_page_async(self, page_number, fetch):
+        """
+        Descarga y procesa una página del listado. Devuelve la lista de frases, una lista vacía si
+        la página no tiene frases o None si la petición falla.
+        """
+        page_url = self.page_url(page_number)
+        self.logger.info("Scraping página: %s", page_url)
+        return await fetch(page_url, self.parse_quotes_page)
+
+    async def produce_quote_batches(self, queue, concurrency, requests_per_second):
+        """
+        Productor del iterador asíncrono: pide las páginas del listado en bloques de `concurrency`
+        páginas, lanza en paralelo las descargas de autores de cada bloque y deja en la cola las
+        filas de cada página en orden. Al terminar deja None en la cola.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        rate_limiter = HostRateLimiter(requests_per_second)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        author_tasks = {}
+
+        try:
+            async with httpx.AsyncClient(limits=limits, timeout=self.timeout, follow_redirects=True) as client:
+                async def fetch(url, parse):
+                    return await self.fetch_async(client, url, semaphore, rate_limiter, parse)
+
+                page_number = 1
+                finished = False
+                while not finished:
+                    batch = range(page_number, page_number + concurrency)
+                    results = await asyncio.gather(*(self.scrape_page_async(n, fetch) for n in batch),
+                                                   return_exceptions=True)
+                    pages = []
+
+                    for offset, quotes in enumerate(results):
+                        # Un error (una página que falta en el archivo en modo replay) solo cuenta si
+                        # la página está antes del final: el bloque pide páginas de más
+                        if isinstance(quotes, BaseException):
+                            raise quotes
+                        # Se respeta el orden de las páginas: la primera vacía o fallida termina el listado
+                        if not quotes:
+                            self.logger.info("No se encontraron más frases.")
+                            finished = True
+                            break
+                        page_url = self.page_url(page_number + offset)
+                        if not self.page_needs_processing(page_url, quotes):
+                            continue
+                        pages.append((page_url, quotes))
+                        for quote in quotes:
+                            autor_url = quote['autor_url']
+                            if autor_url not in author_tasks:
+                                author_tasks[autor_url] = asyncio.create_task(
+                                    self.get_author_details_async(autor_url, fetch))
+
+                    for page_url, quotes in pages:
+                        await asyncio.gather(*(author_tasks[quote['autor_url']] for quote in quotes))
+                        rows = self.build_page_rows(page_url, quotes,
+                                                    lambda autor_url: author_tasks[autor_url].result())
+                        if rows:
+                            await queue.put(rows)
+
+                    page_number += concurrency
+
+                if self.crawl_state is not None:
+                    autor_urls = self.crawl_state.unchecked_authors()
+                    details = await asyncio.gather(*(self.get_author_details_async(autor_url, fetch)
+                                                     for autor_url in autor_urls))
+                    details = dict(zip(autor_urls, details))
+                    rows = self.build_author_rows(autor_urls, details.get)
+                    if rows:
+                        await queue.put(rows)
+
+            self.finish_crawl()
+        finally:
+            # Si el scraping se interrumpe con un error quedan descargas de autores sin esperar
+            for task in author_tasks.values():
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+            await queue.put(None)
+
+    async def aiter_quotes(self, concurrency=10, requests_per_second=None, queue_size=2):
+        """
+        Iterador asíncrono que produce, por cada página del listado, la lista de filas de sus frases.
+
+        El scraping se ejecuta en una tarea aparte y deja las páginas en una cola de tamaño
+        `queue_size`: el consumidor (por ejemplo AsyncDataSaver.save_stream) puede escribir en la
+        base de datos mientras continúan las descargas, con la memoria acotada por la cola.
+        """
+        self.logger.info("Iniciando scraping asíncrono de frases")
+        queue = asyncio.Queue(maxsize=queue_size)
+        producer = asyncio.create_task(self.produce_quote_batches(queue, concurrency, requests_per_second))
+        try:
+            while True:
+                rows = await queue.get()
+                if rows is None:
+                    break
+                yield rows
+            # Propaga cualquier excepción del productor
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+    async def scrape_quotes_async(self, concurrency=10, requests_per_second=None):
+        """
+        Realiza el scraping de forma concurrente: las páginas del listado se piden en bloques de
+        `concurrency` páginas y las páginas de autor se descargan en paralelo a medida que aparecen,
+        todo a través de un único cliente HTTP con conexiones reutilizables.
+
+        Devuelve el mismo par (frases_df, tags_df) que scrape_quotes, con los tags numerados
+        en el mismo orden.
+        """
+        data = []
+        async for rows in self.aiter_quotes(concurrency, requests_per_second):
+            data.extend(rows)
+        frases_df, tags_df = self.rows_to_dataframes(data, all_tags=self.crawl_state is None)
+        self.logger.info("Scraping completado. Total de frases: %d. Total de tags: %d.", len(frases_df), len(tags_df))
+        return frases_df, tags_df
+
+    def finish_crawl(self):
+        """
+        Cierra un scraping: guarda las cachés y traslada el diccionario de tags al estado incremental.
+        """
+        self.logger.info("Caché de autores: %d aciertos, %d fallos.", self.author_cache.hits, self.author_cache.misses)
+        self.logger.info("Respuestas 304 reutilizadas: %d.", self.http_cache.not_modified)
         try:
-            frases_df = pd.DataFrame(data)
+            self.author_cache.save()
+            self.http_cache.save()
+        except OSError as e:
+            self.logger.error("Error al guardar las cachés del scraper: %s", e)
+
+        if self.crawl_state is not None:
+            self.crawl_state.tags = dict(self.tags_dict)
+            self.crawl_state.next_tag_id = self.next_tag_id
+            self.logger.info("Scraping incremental: %d páginas sin cambios omitidas.", self.crawl_state.skipped_pages)
+
+    def rows_to_dataframes(self, rows, all_tags=False):
+        """
+        Convierte filas de frases en los DataFrames de frases y tags. Con all_tags=False el
+        DataFrame de tags solo contiene los tags que usan esas filas (por ejemplo, en un lote o
+        en un delta incremental); con all_tags=True contiene todos los tags conocidos.
+        """
+        tags = self.tags_dict
+        if not all_tags:
+            used_tags = {tag for row in rows for tag in row['Tags']}
+            tags = {tag: tag_id for tag, tag_id in self.tags_dict.items() if tag in used_tags}
+
+        try:
+            frases_df = pd.DataFrame(rows, columns=FRASES_COLUMNS)
             frases_df['autor_descripcion'] = frases_df['autor_descripcion'].str.strip()
-            tags_df = pd.DataFrame(list(self.tags_dict.items()), columns=['tag_texto', 'tag_id'])
-            
-            self.logger.info(f"Scraping completado. Total de frases: {len(frases_df)}. Total de tags: {len(tags_df)}.")
+            tags_df = pd.DataFrame(list(tags.items()), columns=['tag_texto', 'tag_id'])
         except Exception as e:
-            self.logger.error(f"Error al crear los DataFrames: {e}")
+            self.logger.error("Error al crear los DataFrames: %s", e)
             frases_df, tags_df = pd.DataFrame(), pd.DataFrame()
         
         return frases_df, tags_df
@@ -162,9 +605,23 @@ class Scraper:
             with pd.ExcelWriter(filename) as writer:
                 frases_df.to_excel(writer, sheet_name='Frases_Autores_Detalles', index=False)
                 tags_df.to_excel(writer, sheet_name='Tags', index=False)
-            self.logger.info(f"Datos guardados en {filename}")
+            self.logger.info("Datos guardados en %s", filename)
+        except Exception as e:
+            self.logger.error("Error al guardar los datos en Excel: %s", e)
+
+    def save_snapshot(self, frases_df, tags_df, snapshot_dir='snapshots', format='parquet', run_id=None):
+        """
+        Guarda los DataFrames como una nueva partición columnar (Parquet o Arrow IPC) en snapshot_dir.
+        Es mucho más rápido que save_to_excel y conserva los tags como listas (ver snapshots.py).
+        Devuelve la ruta de la partición o None si falla.
+        """
+        try:
+            run_dir = write_snapshot(frases_df, tags_df, snapshot_dir=snapshot_dir, format=format, run_id=run_id)
+            self.logger.info("Instantánea guardada en %s", run_dir)
+            return run_dir
         except Exception as e:
-            self.logger.error(f"Error al guardar los datos en Excel: {e}")
+            self.logger.error("Error al guardar la instantánea: %s", e)
+            return None
 
 if __name__ == "__main__":
     base_url = "https://quotes.toscrape.com/"
@@ -173,3 +630,4 @@ if __name__ == "__main__":
     frases_df, tags_df = scraper.scrape_quotes()
     
     scraper.save_to_excel(frases_df, tags_df)
+    scraper.close()
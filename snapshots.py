@@ -0,0 +1,159 @@
+"""
+Instantáneas columnares (Parquet o Arrow IPC) de los datos del scraper, como alternativa rápida
+a Scraper.save_to_excel.
+
+Cada ejecución se guarda en su propia partición, snapshot_dir/run=<id>/, con un fichero por tabla:
+frases (con los tags como listas nativas), autores, tags y frase_tag. Las particiones anteriores
+no se modifican, por lo que cada ejecución se añade a las existentes. load_snapshot reconstruye
+los DataFrames (frases_df, tags_df) que devuelve el scraper, de modo que AsyncDataSaver puede
+cargarlos sin volver a hacer scraping.
+
+Requiere pyarrow (dependencia opcional: pip install pyarrow).
+"""
+import os
+import shutil
+import time
+import pandas as pd
+from data_normalizer import DataNormalizer, AUTOR_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional: solo hace falta para las instantáneas
+    pa = None
+    pq = None
+
+# Formatos admitidos y extensión de sus ficheros
+SNAPSHOT_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+SNAPSHOT_TABLES = ('frases', 'autores', 'tags', 'frase_tag')
+RUN_PREFIX = 'run='
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("Las instantáneas columnares necesitan pyarrow: pip install pyarrow")
+
+
+def string_array(values):
+    return pa.array([None if pd.isna(value) else str(value) for value in values], type=pa.string())
+
+
+def dictionary_array(values):
+    # Los campos del autor se repiten en muchas frases: se guardan una vez en el diccionario
+    return string_array(values).dictionary_encode()
+
+
+def build_tables(frases_df, tags_df):
+    """Construye las tablas de Arrow de una instantánea a partir de los DataFrames del scraper."""
+    data = DataNormalizer.normalize(frases_df, tags_df)
+    frases = (frases_df.drop_duplicates(subset='frase_texto', keep='last')
+              if not frases_df.empty else pd.DataFrame(columns=['frase_texto', 'autor_nombre', 'autor_apellido',
+                                                                 'Tags', 'Tags_IDs']))
+
+    return {
+        'frases': pa.table({
+            'frase_texto': string_array(frases['frase_texto']),
+            'autor_nombre': dictionary_array(frases['autor_nombre']),
+            'autor_apellido': dictionary_array(frases['autor_apellido']),
+            'tags': pa.array([list(tags) for tags in frases['Tags']], type=pa.list_(pa.string())),
+            'tags_ids': pa.array([[int(tag_id) for tag_id in ids] for ids in frases['Tags_IDs']],
+                                 type=pa.list_(pa.int32())),
+        }),
+        'autores': pa.table({column: string_array(data.autores[column]) for column in AUTOR_COLUMNS}),
+        'tags': pa.table({
+            'tag_id': pa.array(data.tags['tag_id'].astype('int64'), type=pa.int32()),
+            'tag_texto': string_array(data.tags['tag_texto']),
+        }),
+        'frase_tag': pa.table({
+            'frase_texto': string_array(data.frase_tags['frase_texto']),
+            'tag_id': pa.array(data.frase_tags['tag_id'].astype('int64'), type=pa.int32()),
+        }),
+    }
+
+
+def write_table(table, path, format):
+    if format == 'parquet':
+        pq.write_table(table, path, compression='zstd')
+    else:
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+
+def read_table(path):
+    if path.endswith(SNAPSHOT_FORMATS['parquet']):
+        return pq.read_table(path)
+    with pa.OSFile(path, 'rb') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def decode_dictionaries(table):
+    # Las columnas con diccionario se leen como texto normal, con el mismo tipo de pandas que
+    # tienen en los DataFrames del scraper (y no como Categorical)
+    for index, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(field.type.value_type))
+    return table
+
+
+def write_snapshot(frases_df, tags_df, snapshot_dir='snapshots', format='parquet', run_id=None):
+    """
+    Escribe una nueva partición con las tablas de la instantánea y devuelve su ruta. La partición
+    se escribe en un directorio temporal que se renombra al terminar, así nunca queda a medias.
+    """
+    require_pyarrow()
+    if format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Formato desconocido: {format}. Opciones: {', '.join(SNAPSHOT_FORMATS)}")
+
+    run_id = run_id or time.strftime('%Y%m%d-%H%M%S')
+    run_dir = os.path.join(snapshot_dir, f"{RUN_PREFIX}{run_id}")
+    if os.path.exists(run_dir):
+        raise FileExistsError(f"La partición {run_dir} ya existe")
+
+    tmp_dir = run_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, table in build_tables(frases_df, tags_df).items():
+        write_table(table, os.path.join(tmp_dir, name + SNAPSHOT_FORMATS[format]), format)
+    os.replace(tmp_dir, run_dir)
+    return run_dir
+
+
+def list_runs(snapshot_dir='snapshots'):
+    """IDs de las particiones guardadas, de la más antigua a la más reciente."""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(entry[len(RUN_PREFIX):] for entry in os.listdir(snapshot_dir)
+                  if entry.startswith(RUN_PREFIX) and not entry.endswith('.tmp'))
+
+
+def load_snapshot(snapshot_dir='snapshots', run_id=None):
+    """
+    Lee una partición (por defecto la más reciente) y devuelve los DataFrames (frases_df, tags_df)
+    con las mismas columnas que Scraper.scrape_quotes.
+    """
+    require_pyarrow()
+    runs = list_runs(snapshot_dir)
+    if not runs:
+        raise FileNotFoundError(f"No hay instantáneas en {snapshot_dir}")
+    run_id = run_id or runs[-1]
+    run_dir = os.path.join(snapshot_dir, f"{RUN_PREFIX}{run_id}")
+
+    tables = {}
+    for name in SNAPSHOT_TABLES:
+        for extension in SNAPSHOT_FORMATS.values():
+            path = os.path.join(run_dir, name + extension)
+            if os.path.exists(path):
+                tables[name] = decode_dictionaries(read_table(path)).to_pandas()
+                break
+        else:
+            raise FileNotFoundError(f"Falta la tabla {name} en {run_dir}")
+
+    frases = tables['frases']
+    frases['Tags'] = frases['tags'].map(list)
+    frases['Tags_IDs'] = frases['tags_ids'].map(lambda ids: [int(tag_id) for tag_id in ids])
+
+    frases_df = frases.merge(tables['autores'], on=['autor_nombre', 'autor_apellido'], how='left')
+    frases_df = frases_df[['frase_texto'] + AUTOR_COLUMNS + ['Tags', 'Tags_IDs']]
+    tags_df = tables['tags'][['tag_texto', 'tag_id']]
+    return frases_df, tags_df
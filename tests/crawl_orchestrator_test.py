@@ -0,0 +1,127 @@
+import asyncio
+import queue
+import time
+import httpx
+from unittest.mock import patch
+from benchmarks.fixture_server import QuotesSiteServer
+from crawl_orchestrator import CrawlOrchestrator, CrawlOptions, SiteConfig, crawl_site
+
+# Sitio con una estructura distinta a la de quotes.toscrape.com
+OTHER_SITE = SiteConfig(
+    name='otro_sitio',
+    base_url='https://frases.example.com/',
+    selectors={
+        'quotes': "//article[@class='cita']",
+        'quote_text': ".//p[@class='texto']",
+        'quote_author': ".//span[@class='autor']",
+        'quote_link': ".//a[@class='perfil']/@href",
+        'quote_tags': ".//li[@class='etiqueta']",
+    },
+    page_path='listado?pagina={}'
+)
+
+OTHER_SITE_PAGE_HTML = """
+<html>
+    <article class="cita">
+        <p class="texto">Otra frase</p>
+        <span class="autor">Ana García</span>
+        <a class="perfil" href="autores/ana">perfil</a>
+        <ul><li class="etiqueta">vida</li><li class="etiqueta">love</li></ul>
+    </article>
+</html>
+"""
+
+
+def other_site_handler(request):
+    url = str(request.url)
+    if url == 'https://frases.example.com/listado?pagina=1':
+        return httpx.Response(200, text=OTHER_SITE_PAGE_HTML)
+    if url.startswith('https://frases.example.com/autores/'):
+        return httpx.Response(200, text='<html><span class="author-born-date">1 de mayo de 1950</span></html>')
+    return httpx.Response(200, text='<html></html>')
+
+
+def test_crawl_site_uses_site_selectors(tmp_path):
+    real_async_client = httpx.AsyncClient
+
+    def fake_client(**kwargs):
+        return real_async_client(transport=httpx.MockTransport(other_site_handler), **kwargs)
+
+    options = CrawlOptions(cache_dir=str(tmp_path), incremental=True, concurrency=2)
+    with patch('scraper.httpx.AsyncClient', side_effect=fake_client):
+        name, rows, crawl_state, metrics = crawl_site(OTHER_SITE, options)
+
+    assert name == 'otro_sitio'
+    assert [row['frase_texto'] for row in rows] == ['Otra frase']
+    assert rows[0]['autor_apellido'] == 'García'
+    assert rows[0]['autor_fecha_nac'] == '1 de mayo de 1950'
+    assert rows[0]['Tags'] == ['vida', 'love']
+    assert crawl_state.path == str(tmp_path / 'otro_sitio' / 'crawl_state.json')
+    # El proceso devuelve sus métricas para sumarlas en el proceso principal
+    requests = {tuple(sorted(c['labels'].items())): c['value'] for c in metrics['counters']
+                if c['name'] == 'scraper_http_requests_total'}
+    assert requests == {(('kind', 'listing'), ('status', '200')): 2, (('kind', 'author'), ('status', '200')): 1}
+
+
+def test_tag_ids_are_global_across_sites():
+    orchestrator = CrawlOrchestrator([], tags={'love': 4})
+
+    # Cada proceso numera sus tags desde 1; el orquestador los renumera con el registro global
+    first_site = orchestrator.assign_tag_ids([{'Tags': ['love', 'life'], 'Tags_IDs': [1, 2]}])
+    second_site = orchestrator.assign_tag_ids([{'Tags': ['life', 'humor'], 'Tags_IDs': [1, 2]}])
+
+    assert first_site[0]['Tags_IDs'] == [4, 5]
+    assert second_site[0]['Tags_IDs'] == [5, 6]
+
+
+def test_crawl_site_streams_one_batch_per_page(tmp_path):
+    batches = queue.Queue()
+    options = CrawlOptions(cache_dir=str(tmp_path), incremental=False, concurrency=2)
+    with QuotesSiteServer(pages=3, quotes_per_page=2) as server:
+        name, rows, _, _ = crawl_site(SiteConfig('fixture', server.base_url), options, batches)
+
+    # Las filas se envían por la cola página a página y no se devuelven acumuladas
+    assert rows == []
+    assert [len(batches.get_nowait()) for _ in range(batches.qsize())] == [2, 2, 2]
+
+
+def test_orchestrator_yields_pages_while_sites_are_crawled(tmp_path):
+    options = CrawlOptions(cache_dir=str(tmp_path), incremental=False, concurrency=2)
+    with QuotesSiteServer(pages=3, quotes_per_page=2) as server:
+        sites = [SiteConfig('primero', server.base_url), SiteConfig('segundo', server.base_url)]
+        orchestrator = CrawlOrchestrator(sites, options=options, queue_size=1)
+
+        async def collect():
+            return [batch async for batch in orchestrator.aiter_quotes()]
+        batches = asyncio.run(collect())
+
+    # Un lote por página de cada sitio, con los IDs de tag del registro global
+    assert [len(batch) for batch in batches] == [2] * 6
+    tag_ids = {tag: tag_id for batch in batches for row in batch for tag, tag_id in zip(row['Tags'], row['Tags_IDs'])}
+    assert tag_ids == orchestrator.tags_dict
+    requests = sum(c['value'] for c in orchestrator.metrics.snapshot()['counters']
+                   if c['name'] == 'scraper_http_requests_total')
+    assert requests == sum(server.requests.values())
+
+
+def test_orchestrator_stops_promptly_when_consumer_breaks(tmp_path):
+    options = CrawlOptions(cache_dir=str(tmp_path), incremental=False, concurrency=1)
+    # El segundo sitio tarda varios segundos en enviar su primer lote: 20 autores distintos con
+    # 0,2 s de latencia cada uno
+    with QuotesSiteServer(pages=1, quotes_per_page=2) as fast_server, \
+            QuotesSiteServer(pages=1, quotes_per_page=20, author_reuse=0, latency=0.2) as slow_server:
+        sites = [SiteConfig('rapido', fast_server.base_url), SiteConfig('lento', slow_server.base_url)]
+        orchestrator = CrawlOrchestrator(sites, options=options)
+
+        async def first_batch():
+            stream = orchestrator.aiter_quotes()
+            async for batch in stream:
+                break
+            start = time.perf_counter()
+            await stream.aclose()
+            return batch, time.perf_counter() - start
+        batch, closing_seconds = asyncio.run(first_batch())
+
+    # El cierre no espera a que termine el sitio que sigue en marcha
+    assert len(batch) == 2
+    assert closing_seconds < 1
@@ -0,0 +1,126 @@
+import math
+import pandas as pd
+import pytest
+from data_fetcher import DataFetcher, AUTOR_COLUMNS, has_next_page, like_pattern, next_page_cursors
+from text_search import search_query, count_query
+
+
+class FakeConnector:
+    """
+    Conector simulado: guarda cada consulta (con los espacios normalizados) y sus parámetros.
+    Las páginas por keyset se resuelven sobre `ids`, como lo haría la base de datos.
+    """
+
+    def __init__(self, ids=()):
+        self.ids = sorted(ids)
+        self.queries = []
+
+    def fetch_data(self, query, params=None):
+        if 'data_version' in query:
+            return pd.DataFrame({'generation': [1]})
+        self.queries.append((' '.join(query.split()), params))
+        if 'count(*)' in query:
+            return pd.DataFrame({'total': [len(self.ids)]})
+        if 'WHERE frase_id > %s' in query or 'WHERE autor_id > %s' in query:
+            after_id, limit = params
+            column = 'frase_id' if 'frase_id >' in query else 'autor_id'
+            return pd.DataFrame({column: [i for i in self.ids if i > after_id][:limit]}, dtype='int64')
+        return pd.DataFrame()
+
+
+def test_keyset_pages_follow_the_cursors():
+    # IDs con huecos, como tras borrar frases: las páginas no se pueden calcular con OFFSET
+    connector = FakeConnector(ids=[1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144])
+    fetcher = DataFetcher(connector)
+    limit = 4
+    total_pages = math.ceil(fetcher.count_frases() / limit)
+
+    cursors, current_page, pages = [None], 1, []
+    while True:
+        page_df = fetcher.get_frases_page(after_id=cursors[current_page - 1], limit=limit)
+        pages.append(list(page_df['frase_id']))
+        if not has_next_page(current_page, total_pages, page_df):
+            break
+        cursors = next_page_cursors(cursors, current_page, page_df, 'frase_id')
+        current_page += 1
+
+    assert pages == [[1, 2, 3, 5], [8, 13, 21, 34], [55, 89, 144]]
+    assert cursors == [None, 5, 34]
+    # La primera página usa 0 como cursor y cada consulta es un rango sobre el índice
+    query, params = connector.queries[1]
+    assert params == (0, 4)
+    assert 'FROM frase_detalle WHERE frase_id > %s ORDER BY frase_id LIMIT %s' in query
+
+
+def test_next_page_cursors_drops_stale_cursors():
+    page_df = pd.DataFrame({'autor_id': [7, 9]})
+
+    # Al volver a la página 1 y avanzar de nuevo, los cursores posteriores se recalculan
+    assert next_page_cursors([None, 4, 6], 1, page_df, 'autor_id') == [None, 9]
+    assert not has_next_page(1, 3, pd.DataFrame({'autor_id': []}))
+    assert not has_next_page(3, 3, page_df)
+
+
+def test_autores_page_projects_author_columns():
+    connector = FakeConnector(ids=[1, 2, 3])
+    page_df = DataFetcher(connector).get_autores_page(after_id=1, limit=10)
+
+    assert list(page_df['autor_id']) == [2, 3]
+    query, params = connector.queries[0]
+    assert query.startswith(f"SELECT {', '.join(AUTOR_COLUMNS)} FROM autor WHERE autor_id > %s")
+    assert params == (1, 10)
+
+
+def test_get_autores_projects_and_caches_each_column_set():
+    connector = FakeConnector()
+    fetcher = DataFetcher(connector)
+
+    fetcher.get_autores(columns=['autor_id', 'autor_nombre'])
+    fetcher.get_autores(columns=['autor_id', 'autor_nombre'])
+    fetcher.get_autores()
+
+    assert [query for query, _ in connector.queries] == [
+        'SELECT autor_id, autor_nombre FROM autor',
+        f"SELECT {', '.join(AUTOR_COLUMNS)} FROM autor",
+    ]
+    with pytest.raises(ValueError):
+        fetcher.get_autores(columns=['autor_id', 'autor_descripcion; DROP TABLE autor'])
+
+
+def test_stats_read_the_precomputed_views():
+    connector = FakeConnector()
+    fetcher = DataFetcher(connector)
+
+    fetcher.get_author_stats()
+    fetcher.get_tag_stats()
+
+    assert [query for query, _ in connector.queries] == [
+        'SELECT autor_nombre, autor_apellido, frases FROM estadistica_autor '
+        'ORDER BY frases DESC, autor_apellido, autor_nombre',
+        'SELECT tag_texto, frases FROM estadistica_tag ORDER BY frases DESC, tag_texto',
+    ]
+
+
+def test_search_uses_text_search_queries():
+    connector = FakeConnector(ids=[1, 2, 3])
+    fetcher = DataFetcher(connector)
+
+    fetcher.search_quotes('love', offset=10, limit=5)
+    total = fetcher.count_search_results('love')
+    # La segunda búsqueda igual se resuelve desde la caché
+    fetcher.search_quotes('love', offset=10, limit=5)
+
+    search_sql, search_params = search_query('love', 10, 5)
+    count_sql, count_params = count_query('love')
+    assert connector.queries == [(' '.join(search_sql.split()), search_params),
+                                 (' '.join(count_sql.split()), count_params)]
+    assert total == 3
+
+
+def test_author_search_escapes_like_wildcards():
+    connector = FakeConnector()
+    DataFetcher(connector).get_quotes_by_author('100%_real')
+
+    query, params = connector.queries[0]
+    assert params == {'pattern': like_pattern('100%_real')} == {'pattern': '%100\\%\\_real%'}
+    assert 'autor_nombre ILIKE %(pattern)s OR autor_apellido ILIKE %(pattern)s' in query
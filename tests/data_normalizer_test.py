@@ -0,0 +1,39 @@
+import pandas as pd
+from data_normalizer import DataNormalizer
+
+
+def make_frases_df():
+    # Dos frases del mismo autor y una tercera repetida, como puede ocurrir entre páginas
+    return pd.DataFrame({
+        'frase_texto': ['Frase 1', 'Frase 2', 'Frase 1'],
+        'autor_nombre': ['Test', 'Test', 'Test'],
+        'autor_apellido': ['Author', 'Author', 'Author'],
+        'autor_url': ['url', 'url', 'url'],
+        'autor_fecha_nac': ['1900', '1900', '1900'],
+        'autor_lugar_nac': ['Testland', 'Testland', 'Testland'],
+        'autor_descripcion': ['  Descripción  ', '  Descripción  ', '  Descripción  '],
+        'Tags': [['a', 'b'], ['b'], ['a', 'b']],
+        'Tags_IDs': [[1, 2], [2], [1, 2]]
+    })
+
+
+def test_normalize_writes_each_entity_once():
+    tags_df = pd.DataFrame({'tag_texto': ['a', 'b'], 'tag_id': [1, 2]})
+
+    data = DataNormalizer.normalize(make_frases_df(), tags_df)
+
+    assert len(data.autores) == 1
+    assert data.autores.iloc[0]['autor_descripcion'] == 'Descripción'
+    assert sorted(data.frases['frase_texto']) == ['Frase 1', 'Frase 2']
+    assert sorted(data.frase_tags.itertuples(index=False, name=None)) == [
+        ('Frase 1', 1), ('Frase 1', 2), ('Frase 2', 2)]
+    assert list(data.tags['tag_id']) == [1, 2]
+
+
+def test_normalize_empty_frames():
+    data = DataNormalizer.normalize(pd.DataFrame(), pd.DataFrame())
+
+    assert data.autores.empty
+    assert data.frases.empty
+    assert data.frase_tags.empty
+    assert data.tags.empty
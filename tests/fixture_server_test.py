@@ -0,0 +1,19 @@
+from author_cache import AuthorCache
+from benchmarks.fixture_server import QuotesSiteServer
+from http_cache import ConditionalCache
+from scraper import Scraper
+
+
+def test_scraper_crawls_fixture_server():
+    with QuotesSiteServer(pages=2, quotes_per_page=3, author_reuse=0.5) as server:
+        scraper = Scraper(server.base_url, author_cache=AuthorCache(), http_cache=ConditionalCache(), parser='lxml')
+        try:
+            frases_df, tags_df = scraper.scrape_quotes()
+        finally:
+            scraper.close()
+        requests = dict(server.requests)
+
+    # 2 páginas con frases y la tercera vacía; cada autor se descarga una sola vez
+    assert len(frases_df) == 6
+    assert requests == {'listing': 3, 'author': server.author_count}
+    assert frases_df['autor_lugar_nac'].eq('in Ulm, Germany').all()
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+import requests
+from unittest.mock import patch, Mock
+from html_archive import MissingResponse, ResponseArchive
+from http_cache import ConditionalCache
+from scraper import Scraper
+from tests.scraper_test import fake_site
+
+
+def test_archive_round_trip_and_segments(tmp_path):
+    archive = ResponseArchive(str(tmp_path), segment_size=1)
+    archive.append('https://a.example/1', 200, {'ETag': '"v1"'}, '<html>uno</html>')
+    archive.append('https://a.example/2', 200, {}, '<html>dos ñ</html>')
+    archive.append('https://a.example/1', 200, {}, '<html>uno v2</html>')
+    archive.close()
+
+    # Con segment_size=1 cada registro va a su propio segmento
+    assert len(list(tmp_path.glob('segment-*'))) == 3
+
+    # Al reabrir se lee el índice: la última versión de cada URL es la vigente
+    archive = ResponseArchive(str(tmp_path))
+    assert len(archive) == 2
+    assert archive.get('https://a.example/1').text == '<html>uno v2</html>'
+    assert archive.get('https://a.example/2').text == '<html>dos ñ</html>'
+    assert archive.get('https://a.example/3') is None
+
+    # Los registros nuevos se añaden en un segmento nuevo, sin modificar los anteriores
+    archive.append('https://a.example/3', 404, {}, '')
+    archive.close()
+    assert len(list(tmp_path.glob('segment-*'))) == 4
+
+
+@patch('scraper.requests.Session.get')
+def test_replay_reproduces_crawl_without_network(mock_get, tmp_path):
+    mock_get.side_effect = fake_site
+    archive = ResponseArchive(str(tmp_path))
+    frases_df, tags_df = Scraper("https://quotes.toscrape.com/", archive=archive).scrape_quotes()
+    requests_made = mock_get.call_count
+
+    # Replay síncrono y asíncrono sin acceso a la red
+    replayed_df, replayed_tags_df = Scraper("https://quotes.toscrape.com/", replay=archive).scrape_quotes()
+    async_df, _ = asyncio.run(Scraper("https://quotes.toscrape.com/", replay=archive,
+                                      parser='lxml').scrape_quotes_async(concurrency=3))
+
+    assert mock_get.call_count == requests_made
+    assert replayed_df.equals(frases_df)
+    assert replayed_tags_df.equals(tags_df)
+    assert list(async_df['frase_texto']) == list(frases_df['frase_texto'])
+    assert async_df.iloc[0]['autor_fecha_nac'] == 'January 1, 1900'
+
+
+def versioned_site(url, *args, headers=None, **kwargs):
+    # Sitio con ETag que responde 304 a cualquier petición condicional
+    if headers and headers.get('If-None-Match') == '"v1"':
+        return Mock(status_code=304, headers={'ETag': '"v1"'}, text='', content=b'')
+    response = fake_site(url)
+    response.headers = {'ETag': '"v1"'}
+    return response
+
+
+@patch('scraper.requests.Session.get')
+def test_archive_skips_conditional_get_for_unarchived_urls(mock_get, tmp_path):
+    mock_get.side_effect = versioned_site
+    base_url = "https://quotes.toscrape.com/"
+
+    # Validadores de una ejecución anterior sin archivo (como los de http.json)
+    http_cache = ConditionalCache()
+    Scraper(base_url, http_cache=http_cache).scrape_quotes()
+
+    archive = ResponseArchive(str(tmp_path))
+    frases_df, _ = Scraper(base_url, http_cache=http_cache, archive=archive).scrape_quotes()
+
+    # Ninguna URL se resolvió con un 304 sin cuerpo: todas quedan archivadas
+    assert http_cache.not_modified == 0
+    assert set(archive.urls()) == {call.args[0] for call in mock_get.call_args_list}
+    replayed_df, _ = Scraper(base_url, replay=archive).scrape_quotes()
+    assert replayed_df.equals(frases_df)
+
+
+@patch('scraper.requests.Session.get')
+def test_replay_archived_error_ends_listing(mock_get, tmp_path):
+    def site_with_404(url, *args, **kwargs):
+        response = fake_site(url)
+        if url.endswith('page/2/'):
+            response.status_code = 404
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError("404")
+        return response
+    mock_get.side_effect = site_with_404
+    archive = ResponseArchive(str(tmp_path))
+    frases_df, _ = Scraper("https://quotes.toscrape.com/", archive=archive).scrape_quotes()
+
+    # El 404 se archiva y en el replay termina el listado igual que en la descarga
+    assert archive.get("https://quotes.toscrape.com/page/2/").status == 404
+    replayed_df, _ = Scraper("https://quotes.toscrape.com/", replay=archive).scrape_quotes()
+    assert replayed_df.equals(frases_df)
+
+
+def test_replay_missing_url_is_an_error(tmp_path):
+    base_url = "https://quotes.toscrape.com/"
+    archive = ResponseArchive(str(tmp_path))
+    # Archivo incompleto: falta la página del autor y la página vacía que cierra el listado
+    archive.append(base_url + 'page/1/', 200, {}, fake_site(base_url + 'page/1/').text)
+
+    with pytest.raises(MissingResponse):
+        Scraper(base_url, replay=archive).scrape_quotes()
+    with pytest.raises(MissingResponse):
+        asyncio.run(Scraper(base_url, replay=archive).scrape_quotes_async(concurrency=3))
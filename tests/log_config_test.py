@@ -0,0 +1,19 @@
+from logging.handlers import QueueHandler
+from log_config import setup_logging, shutdown_logging
+
+
+def test_handlers_are_installed_once_and_debug_is_gated(tmp_path):
+    logger = setup_logging('prueba_logs', log_dir=str(tmp_path))
+    # Crear varios Scraper (o varias ejecuciones del scheduler) no añade manejadores
+    assert setup_logging('prueba_logs', log_dir=str(tmp_path)) is logger
+    assert [type(handler) for handler in logger.handlers] == [QueueHandler]
+
+    logger.info("Scraping página: %s", 'https://quotes.toscrape.com/page/1/')
+    logger.debug("Frase obtenida: %s", 'no se registra con el nivel INFO')
+    # Parar el listener vacía la cola en el fichero
+    shutdown_logging('prueba_logs')
+
+    with open(tmp_path / 'prueba_logs.log', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 1
+    assert lines[0].endswith("INFO - Scraping página: https://quotes.toscrape.com/page/1/")
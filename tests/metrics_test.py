@@ -0,0 +1,37 @@
+import json
+from metrics import Metrics
+
+
+def test_prometheus_export_has_counters_and_cumulative_buckets():
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics.inc('scraper_http_requests_total', kind='listing', status=200)
+    metrics.inc('scraper_http_requests_total', kind='listing', status=200)
+    metrics.observe('scraper_parse_seconds', 0.05, kind='author')
+    metrics.observe('scraper_parse_seconds', 0.5, kind='author')
+
+    text = metrics.to_prometheus()
+
+    assert '# TYPE scraper_http_requests_total counter' in text
+    assert 'scraper_http_requests_total{kind="listing",status="200"} 2' in text
+    assert 'scraper_parse_seconds_bucket{kind="author",le="0.1"} 1' in text
+    assert 'scraper_parse_seconds_bucket{kind="author",le="1"} 2' in text
+    assert 'scraper_parse_seconds_bucket{kind="author",le="+Inf"} 2' in text
+    assert 'scraper_parse_seconds_count{kind="author"} 2' in text
+
+
+def test_snapshot_merge_and_json_dump(tmp_path):
+    worker = Metrics()
+    worker.inc('saver_rows_total', 10, table='frase')
+    with worker.timer('update_stage_seconds', stage='total'):
+        pass
+
+    # Las métricas de otro proceso llegan como snapshot y se suman
+    metrics = Metrics()
+    metrics.inc('saver_rows_total', 5, table='frase')
+    metrics.merge(json.loads(json.dumps(worker.snapshot())))
+    metrics.dump_json(str(tmp_path / 'run.json'))
+
+    with open(tmp_path / 'run.json', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert saved['counters'] == [{'name': 'saver_rows_total', 'labels': {'table': 'frase'}, 'value': 15}]
+    assert saved['histograms'][0]['count'] == 1
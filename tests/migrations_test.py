@@ -0,0 +1,30 @@
+from migrations import HOT_QUERIES, MIGRATIONS, plan_indexes
+
+
+def test_plan_indexes_walks_nested_plans():
+    # Plan simplificado de EXPLAIN (FORMAT JSON) con un Bitmap Index Scan anidado
+    plan = {
+        'Node Type': 'Bitmap Heap Scan',
+        'Plans': [
+            {'Node Type': 'Bitmap Index Scan', 'Index Name': 'autor_nombre_trgm_idx'}
+        ]
+    }
+
+    assert plan_indexes(plan) == {'autor_nombre_trgm_idx'}
+    assert plan_indexes({'Node Type': 'Seq Scan'}) == set()
+
+
+def test_migration_versions_are_unique_and_ordered():
+    versions = [version for version, _, _ in MIGRATIONS]
+
+    assert versions == sorted(set(versions))
+
+
+def test_hot_query_indexes_are_created_by_migrations():
+    sql = '\n'.join(sql for _, _, sql in MIGRATIONS)
+
+    for name, _, expected_indexes in HOT_QUERIES:
+        for index in expected_indexes:
+            # Los índices de las claves primarias los crea PostgreSQL (<tabla>_pkey)
+            assert index.endswith('_pkey') or f'INDEX IF NOT EXISTS {index} ' in sql or f'INDEX {index} ' in sql, \
+                f"{name}: ninguna migración crea {index}"
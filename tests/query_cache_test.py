@@ -0,0 +1,74 @@
+import threading
+import time
+from query_cache import QueryCache
+
+
+def test_get_or_load_caches_result():
+    cache = QueryCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return 'resultado'
+
+    assert cache.get_or_load('clave', loader) == 'resultado'
+    assert cache.get_or_load('clave', loader) == 'resultado'
+    assert len(calls) == 1
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')  # 'a' pasa a ser la más reciente
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+
+def test_ttl_expiration():
+    cache = QueryCache(ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+
+    assert cache.get('a') is None
+
+
+def test_generation_change_invalidates():
+    cache = QueryCache()
+    cache.check_generation(1)
+    cache.set('a', 1)
+
+    # Misma generación: se conserva; nueva generación: se vacía
+    assert not cache.check_generation(1)
+    assert cache.get('a') == 1
+    assert cache.check_generation(2)
+    assert cache.get('a') is None
+
+
+def test_get_or_load_runs_loader_once_for_concurrent_misses():
+    cache = QueryCache()
+    barrier = threading.Barrier(8)
+    calls = []
+    results = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'resultado'
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get_or_load('clave', loader))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Un solo hilo ejecuta la consulta; los demás reciben su resultado
+    assert len(calls) == 1
+    assert results == ['resultado'] * 8
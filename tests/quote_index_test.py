@@ -0,0 +1,29 @@
+import pandas as pd
+from quote_index import QuoteIndex
+
+
+def make_index():
+    frases_df = pd.DataFrame({
+        'frase_id': [1, 2, 3, 4],
+        'frase_texto': ['Frase 1', 'Frase 2', 'Frase 3', 'Frase 4'],
+        'autor_id': [10, 10, 20, 30],
+        'tags': [['life', 'love'], ['love'], ['life', 'humor'], []]
+    })
+    return QuoteIndex(frases_df)
+
+
+def test_tag_and_author_lookups():
+    index = make_index()
+
+    assert index.quotes_with_tag('love').tolist() == [0, 1]
+    assert index.quotes_by_author(10).tolist() == [0, 1]
+    assert index.quotes_with_tag('desconocido').tolist() == []
+    assert index.rows(index.quotes_by_author(20))['frase_texto'].tolist() == ['Frase 3']
+
+
+def test_multi_tag_filters_and_co_occurrence():
+    index = make_index()
+
+    assert index.filter_tags(['life', 'love'], 'and').tolist() == [0]
+    assert index.filter_tags(['love', 'humor'], 'or').tolist() == [0, 1, 2]
+    assert index.co_occurring_tags(['life']) == [('love', 1), ('humor', 1)]
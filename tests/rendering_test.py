@@ -0,0 +1,32 @@
+import pandas as pd
+from rendering import quotes_html, authors_html
+
+
+def test_quotes_html_escapes_and_renders_one_block_per_quote():
+    frases_df = pd.DataFrame({
+        'frase_texto': ['<b>Hola</b> & adiós', 'Segunda frase'],
+        'autor_nombre': ['Albert', 'Jane'],
+        'autor_apellido': ['Einstein', 'Austen'],
+        'autor_url': ['https://example.com/a?x=1&y="2"', 'https://example.com/b'],
+        'tags': [['life', 'love'], []]
+    })
+
+    html = quotes_html(frases_df)
+
+    assert html.count('<div style=') == 2
+    assert '&lt;b&gt;Hola&lt;/b&gt; &amp; adiós' in html
+    assert 'href="https://example.com/a?x=1&amp;y=&quot;2&quot;"' in html
+    assert '<strong>Tags:</strong> life, love</p>' in html
+    assert quotes_html(frases_df.iloc[0:0]) == ''
+
+
+def test_authors_html_handles_missing_values():
+    autores_df = pd.DataFrame({
+        'autor_nombre': ['Jane'], 'autor_apellido': ['Austen'], 'autor_fecha_nac': [None],
+        'autor_lugar_nac': ['Steventon'], 'autor_descripcion': ['Novelista']
+    })
+
+    html = authors_html(autores_df)
+
+    assert '<strong>Fecha de nacimiento:</strong> </p>' in html
+    assert 'Jane Austen' in html
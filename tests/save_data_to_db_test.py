@@ -0,0 +1,150 @@
+import asyncio
+import re
+from contextlib import asynccontextmanager
+import asyncpg
+import pytest
+from save_data_to_db import AsyncDataSaver
+from snapshots import write_snapshot
+
+
+class FakeConnection:
+    """
+    Conexión de asyncpg simulada con la semántica de PostgreSQL que afecta a la carga con COPY:
+
+    - las tablas temporales ON COMMIT DROP existen hasta el COMMIT de la transacción principal,
+      no hasta que se libera un savepoint;
+    - tras un error la transacción queda abortada: las sentencias siguientes fallan, liberar el
+      savepoint lanza InFailedSQLTransactionError y el COMMIT de la transacción principal la
+      deshace en silencio. Salir del bloque con la excepción (ROLLBACK TO SAVEPOINT) la recupera.
+
+    `merges` cuenta los volcados a las tablas definitivas que llegaron a confirmarse.
+    """
+
+    def __init__(self, fail_frase=None):
+        # Texto de una frase cuyo COPY falla (como un valor no válido)
+        self.fail_frase = fail_frase
+        self.temp_tables = {}
+        self.aborted = False
+        # Volcados pendientes de cada nivel de transacción abierto
+        self.pending_merges = []
+        self.merges = 0
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.pending_merges.append(0)
+        try:
+            yield
+        except BaseException:
+            self.pending_merges.pop()
+            self.aborted = False
+            if not self.pending_merges:
+                self.temp_tables.clear()
+            raise
+
+        merges = self.pending_merges.pop()
+        if not self.pending_merges:
+            # COMMIT: si la transacción estaba abortada PostgreSQL hace ROLLBACK sin error
+            if not self.aborted:
+                self.merges += merges
+            self.aborted = False
+            self.temp_tables.clear()
+        elif self.aborted:
+            raise asyncpg.exceptions.InFailedSQLTransactionError(
+                'current transaction is aborted, commands ignored until end of transaction block')
+        else:
+            self.pending_merges[-1] += merges
+
+    def check_aborted(self):
+        if self.aborted:
+            raise asyncpg.exceptions.InFailedSQLTransactionError(
+                'current transaction is aborted, commands ignored until end of transaction block')
+
+    async def execute(self, sql, *args):
+        self.check_aborted()
+        for statement in filter(str.strip, sql.split(';')):
+            create = re.search(r'CREATE TEMP TABLE (IF NOT EXISTS )?(\w+)', statement)
+            if create:
+                if create.group(2) in self.temp_tables and not create.group(1):
+                    self.aborted = True
+                    raise asyncpg.exceptions.DuplicateTableError(f'relation "{create.group(2)}" already exists')
+                self.temp_tables.setdefault(create.group(2), [])
+            elif statement.strip().startswith('TRUNCATE'):
+                for table in re.findall(r'tmp_\w+', statement):
+                    self.temp_tables[table] = []
+            elif re.search(r'FROM tmp_frase\b', statement):
+                self.pending_merges[-1] += 1
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.check_aborted()
+        records = list(records)
+        if any(self.fail_frase in record for record in records):
+            self.aborted = True
+            raise asyncpg.exceptions.DataError('valor no válido')
+        self.temp_tables[table].extend(records)
+
+
+def row(frase_texto, nombre, apellido, tag, tag_id):
+    return {'frase_texto': frase_texto, 'autor_nombre': nombre, 'autor_apellido': apellido,
+            'autor_url': f'/author/{nombre}', 'autor_fecha_nac': '', 'autor_lugar_nac': '',
+            'autor_descripcion': '', 'Tags': [tag], 'Tags_IDs': [tag_id]}
+
+
+async def two_batches():
+    yield [row('Primera', 'Ana', 'García', 'vida', 1)]
+    yield [row('Segunda', 'Luis', 'Pérez', 'amor', 2)]
+
+
+def test_save_stream_copies_several_batches_in_one_transaction():
+    conn = FakeConnection()
+    saver = AsyncDataSaver('db', 'user', 'password', 'localhost', 5432, method='copy')
+
+    async def run():
+        async with conn.transaction():
+            total = await saver.save_stream(two_batches(), conn=conn)
+            # Las tablas temporales solo contienen el último lote
+            assert [row[0] for row in conn.temp_tables['tmp_frase']] == ['Segunda']
+            return total
+
+    assert asyncio.run(run()) == 2
+    # Cada lote llegó a las tablas definitivas
+    assert conn.merges == 2
+    assert rows_written(saver) == {'autor': 2, 'tag': 2, 'frase': 2, 'frase_tag': 2}
+
+
+def rows_written(saver):
+    return {counter['labels']['table']: counter['value'] for counter in saver.metrics.snapshot()['counters']
+            if counter['name'] == 'saver_rows_total'}
+
+
+def test_failed_batch_rolls_back_only_its_savepoint():
+    conn = FakeConnection(fail_frase='Primera')
+    saver = AsyncDataSaver('db', 'user', 'password', 'localhost', 5432, method='copy')
+
+    async def run():
+        async with conn.transaction():
+            return await saver.save_stream(two_batches(), conn=conn)
+
+    # El primer lote se deshace y no se cuenta; el segundo se escribe y la transacción se confirma
+    assert asyncio.run(run()) == 1
+    assert conn.merges == 1
+    assert rows_written(saver) == {'autor': 1, 'tag': 1, 'frase': 1, 'frase_tag': 1}
+
+
+def test_save_snapshot_loads_latest_run(tmp_path):
+    pytest.importorskip('pyarrow')
+    rows = [row('Primera', 'Ana', 'García', 'vida', 1), row('Segunda', 'Ana', 'García', 'amor', 2)]
+    frases_df, tags_df = AsyncDataSaver.rows_to_dataframes(rows)
+    write_snapshot(frases_df, tags_df, snapshot_dir=str(tmp_path), run_id='20240101-000000')
+
+    conn = FakeConnection()
+    saver = AsyncDataSaver('db', 'user', 'password', 'localhost', 5432, method='copy')
+
+    async def run():
+        async with conn.transaction():
+            total = await saver.save_snapshot(str(tmp_path), conn=conn)
+            assert sorted(record[0] for record in conn.temp_tables['tmp_frase']) == ['Primera', 'Segunda']
+            assert sorted(conn.temp_tables['tmp_frase_tag']) == [('Primera', 1), ('Segunda', 2)]
+            return total
+
+    assert asyncio.run(run()) == 2
+    assert rows_written(saver) == {'autor': 1, 'tag': 2, 'frase': 2, 'frase_tag': 2}
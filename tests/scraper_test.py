@@ -1,8 +1,14 @@
+import asyncio
+import httpx
 import pytest
 from unittest.mock import patch, Mock
 from scraper import Scraper
+from author_cache import AuthorCache
+from crawl_state import CrawlState
+from http_cache import ConditionalCache
 import pandas as pd
 import os
+import time
 
 """
 para ejecutar indicar: pytest en el directorio raiz
@@ -15,11 +21,12 @@ def scraper():
     base_url = "https://quotes.toscrape.com/"
     return Scraper(base_url)
 
-@patch('scraper.requests.get')
+@patch('scraper.requests.Session.get')
 def test_get_author_details(mock_get, scraper):
     # Configurar el mock para la respuesta de requests
     mock_response = Mock()
     mock_response.status_code = 200
+    mock_response.headers = {}
     mock_response.text = """
     <html>
         <span class="author-born-date">January 1, 1900</span>
@@ -27,6 +34,7 @@ def test_get_author_details(mock_get, scraper):
         <div class="author-description">Test author description.</div>
     </html>
     """
+    mock_response.content = mock_response.text.encode('utf-8')
     mock_get.return_value = mock_response
 
     # URL de prueba
@@ -38,25 +46,48 @@ def test_get_author_details(mock_get, scraper):
     assert details['author-born-location'] == 'in Testland'
     assert details['author-description'] == 'Test author description.'
 
-@patch('scraper.requests.get')
-def test_scrape_quotes(mock_get, scraper):
-    # Configurar el mock para la respuesta de requests
+QUOTES_PAGE_HTML = """
+<html>
+    <div class="quote">
+        <span class="text">“Test quote”</span>
+        <small class="author">Test Author</small>
+        <a href="/author/test_author">(author details)</a>
+        <div class="tags">
+            <a class="tag">test</a>
+            <a class="tag">quote</a>
+        </div>
+    </div>
+</html>
+"""
+
+AUTHOR_PAGE_HTML = """
+<html>
+    <span class="author-born-date">January 1, 1900</span>
+    <span class="author-born-location">in Testland</span>
+    <div class="author-description">Test author description.</div>
+</html>
+"""
+
+
+def fake_site(url, *args, **kwargs):
+    # Solo la primera página tiene frases; las siguientes están vacías para terminar el bucle
     mock_response = Mock()
     mock_response.status_code = 200
-    mock_response.text = """
-    <html>
-        <div class="quote">
-            <span class="text">“Test quote”</span>
-            <small class="author">Test Author</small>
-            <a href="/author/test_author">(author details)</a>
-            <div class="tags">
-                <a class="tag">test</a>
-                <a class="tag">quote</a>
-            </div>
-        </div>
-    </html>
-    """
-    mock_get.return_value = mock_response
+    mock_response.headers = {}
+    if '/author/' in url:
+        mock_response.text = AUTHOR_PAGE_HTML
+    elif url.endswith('page/1/'):
+        mock_response.text = QUOTES_PAGE_HTML
+    else:
+        mock_response.text = "<html></html>"
+    mock_response.content = mock_response.text.encode('utf-8')
+    return mock_response
+
+
+@patch('scraper.requests.Session.get')
+def test_scrape_quotes(mock_get, scraper):
+    # Configurar el mock para la respuesta de requests
+    mock_get.side_effect = fake_site
 
     # Probar el scraping
     frases_df, tags_df = scraper.scrape_quotes()
@@ -68,6 +99,136 @@ def test_scrape_quotes(mock_get, scraper):
     assert 'test' in frases_df.iloc[0]['Tags']
     assert 'quote' in frases_df.iloc[0]['Tags']
 
+@patch('scraper.requests.Session.get')
+def test_get_author_details_uses_cache(mock_get, scraper):
+    mock_get.side_effect = fake_site
+
+    test_url = scraper.base_url + 'author/test_author'
+    first = scraper.get_author_details(test_url)
+    second = scraper.get_author_details(test_url)
+
+    # La segunda llamada se resuelve desde la caché sin volver a descargar la página
+    assert first == second
+    assert mock_get.call_count == 1
+
+@patch('scraper.requests.Session.get')
+def test_conditional_get_reuses_parsed_page(mock_get, scraper):
+    first_response = Mock(status_code=200, headers={'ETag': '"v1"'}, text=AUTHOR_PAGE_HTML,
+                          content=AUTHOR_PAGE_HTML.encode('utf-8'))
+    not_modified = Mock(status_code=304, headers={'ETag': '"v1"'}, text='', content=b'')
+    mock_get.side_effect = [first_response, not_modified]
+
+    test_url = scraper.base_url + 'author/test_author'
+    with patch.object(scraper, 'parse_author_page', wraps=scraper.parse_author_page) as parse:
+        first = scraper.fetch_page(test_url, scraper.parse_author_page)
+        second = scraper.fetch_page(test_url, scraper.parse_author_page)
+
+    # La segunda petición es condicional y el 304 evita volver a procesar la página
+    assert mock_get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
+    assert first == second
+    assert parse.call_count == 1
+    assert scraper.http_cache.not_modified == 1
+
+@patch('scraper.requests.Session.get')
+def test_incremental_scrape_emits_only_changes(mock_get, tmp_path):
+    mock_get.side_effect = fake_site
+    state_path = str(tmp_path / 'crawl_state.json')
+    base_url = "https://quotes.toscrape.com/"
+
+    first_state = CrawlState(path=state_path)
+    frases_df, tags_df = Scraper(base_url, crawl_state=first_state).scrape_quotes()
+    first_state.save()
+    assert len(frases_df) == 1
+    assert len(tags_df) == 2
+
+    # Segunda ejecución sin cambios: la página se omite y no se emite nada
+    second_state = CrawlState(path=state_path)
+    frases_df, tags_df = Scraper(base_url, crawl_state=second_state).scrape_quotes()
+    assert frases_df.empty
+    assert tags_df.empty
+    assert second_state.skipped_pages == 1
+    assert second_state.next_tag_id == 3
+
+@patch('scraper.requests.Session.get')
+def test_incremental_scrape_detects_author_page_change(mock_get, tmp_path):
+    state_path = str(tmp_path / 'crawl_state.json')
+    cache_path = str(tmp_path / 'autores.json')
+    base_url = "https://quotes.toscrape.com/"
+
+    # La página del autor trae ETag, así que cada ejecución incremental la revalida
+    def site_with_etag(url, *args, **kwargs):
+        response = fake_site(url)
+        if '/author/' in url:
+            response.headers = {'ETag': '"v1"'}
+        return response
+    mock_get.side_effect = site_with_etag
+
+    http_cache = ConditionalCache()
+    first_state = CrawlState(path=state_path)
+    first_scraper = Scraper(base_url, crawl_state=first_state, author_cache=AuthorCache(path=cache_path),
+                            http_cache=http_cache)
+    first_scraper.scrape_quotes()
+    first_state.save()
+
+    # Solo cambia la página del autor: el listado es igual y la caché de autores no ha caducado
+    def changed_author(url, *args, **kwargs):
+        response = fake_site(url)
+        if '/author/' in url:
+            response.headers = {'ETag': '"v2"'}
+            response.text = AUTHOR_PAGE_HTML.replace('Test author description.', 'New description.')
+            response.content = response.text.encode('utf-8')
+        return response
+    mock_get.side_effect = changed_author
+
+    second_state = CrawlState(path=state_path)
+    frases_df, _ = Scraper(base_url, crawl_state=second_state, author_cache=AuthorCache(path=cache_path),
+                           http_cache=http_cache).scrape_quotes()
+    assert second_state.skipped_pages == 1
+    assert list(frases_df['frase_texto']) == ['“Test quote”']
+    assert frases_df.iloc[0]['autor_descripcion'] == 'New description.'
+
+@patch('scraper.requests.Session.get')
+def test_incremental_scrape_uses_author_cache_without_validators(mock_get, tmp_path):
+    mock_get.side_effect = fake_site
+    state_path = str(tmp_path / 'crawl_state.json')
+    cache_path = str(tmp_path / 'autores.json')
+    base_url = "https://quotes.toscrape.com/"
+
+    first_state = CrawlState(path=state_path)
+    Scraper(base_url, crawl_state=first_state, author_cache=AuthorCache(path=cache_path)).scrape_quotes()
+    first_state.save()
+    mock_get.reset_mock()
+
+    # Sin ETag ni Last-Modified no hay petición condicional: la caché de autores vigente basta
+    second_state = CrawlState(path=state_path)
+    frases_df, _ = Scraper(base_url, crawl_state=second_state, author_cache=AuthorCache(path=cache_path)).scrape_quotes()
+    assert frases_df.empty
+    assert not [call for call in mock_get.call_args_list if '/author/' in call.args[0]]
+
+def test_parsers_extract_same_data():
+    base_url = "https://quotes.toscrape.com/"
+    soup_scraper = Scraper(base_url, parser='bs4')
+    lxml_scraper = Scraper(base_url, parser='lxml')
+
+    # El backend lxml debe devolver exactamente lo mismo que BeautifulSoup
+    assert lxml_scraper.parse_quotes_page(QUOTES_PAGE_HTML) == soup_scraper.parse_quotes_page(QUOTES_PAGE_HTML)
+    assert lxml_scraper.parse_author_page(AUTHOR_PAGE_HTML) == soup_scraper.parse_author_page(AUTHOR_PAGE_HTML)
+    assert lxml_scraper.parse_quotes_page("<html></html>") == []
+
+def test_author_cache_persistence_and_ttl(tmp_path):
+    cache_path = tmp_path / 'autores.json'
+    cache = AuthorCache(path=str(cache_path), ttl=60)
+    cache.set('https://example.com/author/a', {'author-born-date': 'hoy'})
+    cache.save()
+
+    reloaded = AuthorCache(path=str(cache_path), ttl=60)
+    assert reloaded.get('https://example.com/author/a') == {'author-born-date': 'hoy'}
+
+    # Con TTL 0 las entradas guardadas ya se consideran caducadas
+    expired = AuthorCache(path=str(cache_path), ttl=0)
+    time.sleep(0.01)
+    assert expired.get('https://example.com/author/a') is None
+
 def test_save_to_excel(scraper):
     # Crear dataframes de prueba
     frases_df = pd.DataFrame({
@@ -99,3 +260,30 @@ def test_save_to_excel(scraper):
     
     assert result
 
+
+def test_scrape_quotes_async(scraper):
+    real_async_client = httpx.AsyncClient
+
+    def handler(request):
+        return httpx.Response(200, text=fake_site(str(request.url)).text)
+
+    def fake_client(**kwargs):
+        return real_async_client(transport=httpx.MockTransport(handler), **kwargs)
+
+    with patch('scraper.httpx.AsyncClient', side_effect=fake_client):
+        frases_df, tags_df = asyncio.run(scraper.scrape_quotes_async(concurrency=3))
+
+    # El modo asíncrono devuelve el mismo resultado que el secuencial
+    assert len(frases_df) == 1
+    assert list(tags_df['tag_texto']) == ['test', 'quote']
+    assert frases_df.iloc[0]['autor_fecha_nac'] == 'January 1, 1900'
+    assert frases_df.iloc[0]['Tags_IDs'] == [1, 2]
+
+@patch('scraper.requests.Session.get')
+def test_iter_quotes_yields_one_batch_per_page(mock_get, scraper):
+    mock_get.side_effect = fake_site
+
+    batches = list(scraper.iter_quotes())
+
+    assert len(batches) == 1
+    assert [row['frase_texto'] for row in batches[0]] == ['“Test quote”']
@@ -0,0 +1,37 @@
+import pytest
+import pandas as pd
+from snapshots import write_snapshot, load_snapshot, list_runs
+
+pytest.importorskip('pyarrow')
+
+
+def scraper_dataframes():
+    frases_df = pd.DataFrame({
+        'frase_texto': ['Frase 1', 'Frase 2'],
+        'autor_nombre': ['Albert', 'Albert'],
+        'autor_apellido': ['Einstein', 'Einstein'],
+        'autor_url': ['https://quotes.toscrape.com/author/Albert-Einstein'] * 2,
+        'autor_fecha_nac': ['March 14, 1879'] * 2,
+        'autor_lugar_nac': ['in Ulm, Germany'] * 2,
+        'autor_descripcion': ['Físico.'] * 2,
+        'Tags': [['life', 'love'], []],
+        'Tags_IDs': [[1, 2], []]
+    })
+    tags_df = pd.DataFrame({'tag_texto': ['life', 'love'], 'tag_id': [1, 2]})
+    return frases_df, tags_df
+
+
+@pytest.mark.parametrize('format', ['parquet', 'arrow'])
+def test_snapshot_round_trip_keeps_lists_and_appends_runs(tmp_path, format):
+    frases_df, tags_df = scraper_dataframes()
+
+    write_snapshot(frases_df, tags_df, snapshot_dir=str(tmp_path), format=format, run_id='20240101-000000')
+    write_snapshot(frases_df.iloc[:1], tags_df, snapshot_dir=str(tmp_path), format=format, run_id='20240102-000000')
+
+    assert list_runs(str(tmp_path)) == ['20240101-000000', '20240102-000000']
+
+    loaded_frases, loaded_tags = load_snapshot(str(tmp_path), '20240101-000000')
+    pd.testing.assert_frame_equal(loaded_frases, frases_df)
+    assert loaded_tags.to_dict('records') == tags_df.to_dict('records')
+    # Sin indicar la partición se lee la más reciente
+    assert len(load_snapshot(str(tmp_path))[0]) == 1
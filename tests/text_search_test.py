@@ -0,0 +1,32 @@
+import re
+from migrations import MIGRATIONS
+from text_search import SEARCH_CONFIG, search_query, count_query
+
+
+def placeholders(query):
+    return set(re.findall(r'%\((\w+)\)s', query))
+
+
+def test_search_query_params():
+    query, params = search_query('dickens love', offset=20, limit=10)
+
+    assert params == {'config': SEARCH_CONFIG, 'text': 'dickens love', 'limit': 10, 'offset': 20}
+    assert placeholders(query) == set(params)
+    assert 'websearch_to_tsquery(%(config)s, %(text)s)' in query
+    assert 'LIMIT %(limit)s OFFSET %(offset)s' in query
+
+
+def test_count_query_params():
+    query, params = count_query('rowling')
+
+    assert params == {'config': SEARCH_CONFIG, 'text': 'rowling'}
+    assert placeholders(query) == set(params)
+    assert 'documento @@ websearch_to_tsquery(%(config)s, %(text)s)' in query
+
+
+def test_document_uses_search_config():
+    # La última migración que define documento debe usar la configuración de las consultas en
+    # todas sus partes; si no, palabras como 'Dickens' se normalizan distinto en cada lado
+    sql = [sql for _, _, sql in sorted(MIGRATIONS) if 'AS documento' in sql][-1]
+
+    assert set(re.findall(r"to_tsvector\('(\w+)'", sql)) == {SEARCH_CONFIG}
@@ -0,0 +1,32 @@
+"""
+Full-text search queries over frase_detalle.documento (see migrations.py), used by DataFetcher.
+"""
+
+# Text search configuration of frase_detalle.documento. Both parts of the document (quote text
+# and author name) and the queries use it, so that words are stemmed the same way on both sides
+SEARCH_CONFIG = 'english'
+
+SEARCH_SQL = """
+SELECT frase_id, frase_texto, autor_nombre, autor_apellido, autor_url, tags,
+       ts_rank(documento, consulta) AS rank
+FROM frase_detalle, websearch_to_tsquery(%(config)s, %(text)s) AS consulta
+WHERE documento @@ consulta
+ORDER BY rank DESC, frase_id
+LIMIT %(limit)s OFFSET %(offset)s
+"""
+
+COUNT_SQL = """
+SELECT count(*) AS total
+FROM frase_detalle
+WHERE documento @@ websearch_to_tsquery(%(config)s, %(text)s)
+"""
+
+
+def search_query(search_text, offset=0, limit=10):
+    """Returns the query and parameters of one page of results, best matches first."""
+    return SEARCH_SQL, {'config': SEARCH_CONFIG, 'text': search_text, 'limit': limit, 'offset': offset}
+
+
+def count_query(search_text):
+    """Returns the query and parameters that count the matches of a search."""
+    return COUNT_SQL, {'config': SEARCH_CONFIG, 'text': search_text}
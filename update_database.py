@@ -1,55 +1,137 @@
 import asyncio
-import asyncpg
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from scraper import Scraper
 import db  # Asegúrate de que este módulo tenga la configuración de la base de datos
 from save_data_to_db import AsyncDataSaver
+from db_pool import create_pool
+from crawl_orchestrator import CrawlOrchestrator, CrawlOptions, SiteConfig
+from metrics import Metrics
 import time  # Para medir el tiempo de ejecución
+import os
+
+# Sitios de frases que se recorren en paralelo, uno por proceso (ver crawl_orchestrator.py)
+SITES = [
+    SiteConfig('quotes_toscrape', 'https://quotes.toscrape.com/'),
+]
+
+# Carpeta de las cachés de cada sitio: autores, validadores ETag/Last-Modified y, en modo
+# incremental, las huellas de páginas, frases y autores de la ejecución anterior
+CACHE_DIR = 'cache'
+AUTHOR_CACHE_TTL = 7 * 24 * 3600  # Una semana
+# Guardar las respuestas HTTP de cada sitio en CACHE_DIR/<sitio>/archive para poder repetir la
+# extracción sin volver a descargar (python html_archive.py <archivo> <URL base>)
+ARCHIVE_RESPONSES = False
+
+# Límites del scraping asíncrono: peticiones simultáneas y peticiones por segundo al mismo host
+SCRAPER_CONCURRENCY = 10
+SCRAPER_REQUESTS_PER_SECOND = 20
+
+# Métricas: cada actualización guarda las suyas en METRICS_DIR/update-<fecha>.json y, si se
+# indica un puerto (por ejemplo 9108), las acumuladas se sirven en formato Prometheus en /metrics
+METRICS_DIR = 'metrics'
+METRICS_PORT = None
+
+# Vistas materializadas (ver migrations.py) que se recalculan al final de cada actualización
+MATERIALIZED_VIEWS = ('frase_detalle', 'estadistica_autor', 'estadistica_tag')
 
 class DatabaseUpdater:
-    def __init__(self, db_name, db_user, db_password, db_host, db_port):
+    def __init__(self, db_name, db_user, db_password, db_host, db_port, incremental=True, pool=None):
         self.db_name = db_name
         self.db_user = db_user
         self.db_password = db_password
         self.db_host = db_host
         self.db_port = db_port
+        # En modo incremental solo se escriben en la base de datos las frases nuevas o modificadas
+        self.incremental = incremental
+        # Pool de conexiones compartido entre ejecuciones; se crea en la primera si no se indica
+        self.pool = pool
+        # Métricas acumuladas de todas las ejecuciones (las que se exponen a Prometheus)
+        self.metrics = Metrics()
+
+    async def get_pool(self):
+        if self.pool is None:
+            self.pool = await create_pool(self.db_name, self.db_user, self.db_password, self.db_host, self.db_port)
+        return self.pool
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def bump_data_version(self, conn):
+        """Incrementa la generación de los datos que usa la app para invalidar su caché."""
+        await conn.execute("""
+        INSERT INTO data_version (id, generation, updated_at) VALUES (1, 1, now())
+        ON CONFLICT (id) DO UPDATE SET generation = data_version.generation + 1, updated_at = now()
+        """)
+
+    async def refresh_views(self, conn):
+        """
+        Recalcula las vistas materializadas que lee la app (frases y estadísticas). CONCURRENTLY
+        deja que las consultas sigan leyendo la versión anterior mientras se recalculan.
+        """
+        for view in MATERIALIZED_VIEWS:
+            await conn.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+
+    async def load_tags(self, conn):
+        """Tags ya guardados con sus IDs, para que el scraping siga la misma numeración."""
+        rows = await conn.fetch("SELECT tag_texto, tag_id FROM tag")
+        return {row['tag_texto']: row['tag_id'] for row in rows}
 
     async def update_database(self):
         start_time = time.time()  # Marca el inicio del proceso
         print("Iniciando actualización de base de datos...")
+        # Métricas de esta ejecución: red, procesamiento del HTML, sentencias y duración de cada etapa
+        run_metrics = Metrics()
 
-        # Crear una instancia del scraper
-        base_url = "https://quotes.toscrape.com/"
-        scraper = Scraper(base_url)
-        
-        # Obtener datos de las citas y etiquetas
-        frases_df, tags_df = scraper.scrape_quotes()
-
-        # Conectar a la base de datos
-        conn = await asyncpg.connect(
-            database=self.db_name,
-            user=self.db_user,
-            password=self.db_password,
-            host=self.db_host,
-            port=self.db_port
-        )
+        # Opciones comunes del scraping de todos los sitios
+        options = CrawlOptions(cache_dir=CACHE_DIR, incremental=self.incremental, author_cache_ttl=AUTHOR_CACHE_TTL,
+                               concurrency=SCRAPER_CONCURRENCY, requests_per_second=SCRAPER_REQUESTS_PER_SECOND,
+                               archive=ARCHIVE_RESPONSES)
 
-        try:
-            async with conn.transaction():
-                # Insertar o actualizar datos en la base de datos
-                data_saver = AsyncDataSaver(self.db_name, self.db_user, self.db_password, self.db_host, self.db_port)
-                await data_saver.save_to_database(frases_df, tags_df)
-                print("Actualización completada.")
-        except Exception as e:
-            print(f"Error durante la actualización: {e}")
-        finally:
-            await conn.close()
+        pool = await self.get_pool()
+
+        # Toda la actualización se hace en una única transacción sobre una conexión del pool
+        async with pool.acquire() as conn:
+            try:
+                async with conn.transaction():
+                    # Los sitios se recorren en paralelo con IDs de tag comunes a todos ellos
+                    orchestrator = CrawlOrchestrator(SITES, options=options, tags=await self.load_tags(conn),
+                                                     metrics=run_metrics)
+                    # Cada página se escribe en cuanto llega de su proceso, mientras sigue el scraping
+                    # de las demás; como scraping y escritura se solapan, se miden juntos
+                    data_saver = AsyncDataSaver(self.db_name, self.db_user, self.db_password, self.db_host,
+                                                self.db_port, pool=pool, metrics=run_metrics)
+                    with run_metrics.timer('update_stage_seconds', stage='crawl_and_load'):
+                        total = await data_saver.save_stream(orchestrator.aiter_quotes(), conn=conn)
+                    # Las vistas se recalculan antes de cambiar la generación, para que la app no
+                    # guarde en caché datos anteriores con la generación nueva
+                    with run_metrics.timer('update_stage_seconds', stage='refresh_views'):
+                        await self.refresh_views(conn)
+                    # Nueva generación de datos: invalida la caché de consultas de la app
+                    await self.bump_data_version(conn)
+                    print(f"Actualización completada. Frases escritas: {total}.")
+                # El estado solo se guarda si los deltas se escribieron, para no perderlos ante un error
+                orchestrator.save_state()
+            except Exception as e:
+                run_metrics.inc('update_errors_total')
+                print(f"Error durante la actualización: {e}")
 
         end_time = time.time()  # Marca el final del proceso
         elapsed_time = end_time - start_time
+        run_metrics.observe('update_stage_seconds', elapsed_time, stage='total')
+        self.save_metrics(run_metrics)
         print(f"Tiempo total de actualización: {elapsed_time:.2f} segundos")
 
+    def save_metrics(self, run_metrics):
+        """Guarda las métricas de la ejecución en JSON y las suma a las acumuladas."""
+        self.metrics.merge(run_metrics.snapshot())
+        path = os.path.join(METRICS_DIR, f"update-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        try:
+            run_metrics.dump_json(path)
+        except OSError as e:
+            print(f"Error al guardar las métricas: {e}")
+
 # Configuración del scheduler
 def main():
     db_name = db.DB_NAME
@@ -59,6 +141,9 @@ def main():
     db_port = db.DB_PORT
 
     updater = DatabaseUpdater(db_name, db_user, db_password, db_host, db_port)
+    if METRICS_PORT is not None:
+        updater.metrics.serve(METRICS_PORT)
+        print(f"Métricas disponibles en http://127.0.0.1:{METRICS_PORT}/metrics")
 
     scheduler = AsyncIOScheduler()
 
@@ -80,6 +165,7 @@ def main():
     except (KeyboardInterrupt, SystemExit):
         print("Deteniendo scheduler...")
         scheduler.shutdown()
+        asyncio.get_event_loop().run_until_complete(updater.close())
 
 if __name__ == "__main__":
     main()